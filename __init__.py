@@ -1,7 +1,30 @@
 import sys
 if sys.version_info[0]<3:
     from jcparser import JCParser, test
+    from jcparser import enable_parse_cache, disable_parse_cache, parse_cache_info
+    from jcparser import configure_autoupdate, stop_autoupdate, JCSnapshot, parse_many
+    from jcparser import JCLazyData, JCStats, add_stats_hook, remove_stats_hook, JCDiagnostic
+    from jcparser import JCSchema, compile_schema, JCPath
 else:
     from . import jcparser
     JCParser = jcparser.JCParser
-    test = jcparser.test
\ No newline at end of file
+    test = jcparser.test
+    enable_parse_cache = jcparser.enable_parse_cache
+    disable_parse_cache = jcparser.disable_parse_cache
+    parse_cache_info = jcparser.parse_cache_info
+    configure_autoupdate = jcparser.configure_autoupdate
+    stop_autoupdate = jcparser.stop_autoupdate
+    JCSnapshot = jcparser.JCSnapshot
+    parse_many = jcparser.parse_many
+    JCLazyData = jcparser.JCLazyData
+    JCStats = jcparser.JCStats
+    add_stats_hook = jcparser.add_stats_hook
+    remove_stats_hook = jcparser.remove_stats_hook
+    JCDiagnostic = jcparser.JCDiagnostic
+    JCSchema = jcparser.JCSchema
+    compile_schema = jcparser.compile_schema
+    JCPath = jcparser.JCPath
+
+    from . import jcasync
+    aparse = jcasync.aparse
+    awatch = jcasync.awatch
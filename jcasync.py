@@ -0,0 +1,64 @@
+# asyncio front end to jcparser, for python3 only as it uses async/await
+# author: Glayn Bukman <glayn@bukman@gmail.com>
+"""
+parse and watch jerm-config files from asyncio code without blocking the event loop.
+
+    parser = await aparse("/tmp/test.jconf")
+
+    async for snapshot in awatch("/tmp/test.jconf"):
+        print(snapshot.generation, dict(snapshot))
+"""
+
+__ALL__ = ["aparse", "awatch"]
+import asyncio, functools, os, errno
+
+try:
+    from . import jcparser
+except ImportError: # run from the JermConfig directory
+    import jcparser
+
+async def aparse(fpath, executor=None, **options):
+    '''
+    parse fpath in `executor` (the loop's default thread pool if None) and return the
+    JCParser. keyword arguments are passed to JCParser
+    '''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(jcparser.JCParser, fpath, **options))
+
+async def awatch(fpath, executor=None, **options):
+    '''
+    autoupdate fpath and yield a JCSnapshot of it each time it changes, starting with the
+    current one. the autoupdate daemon only wakes the loop (with call_soon_threadsafe) and
+    the snapshot is picked up on the loop, so a consumer that falls behind gets the latest
+    snapshot rather than every one in between. the file is unwatched when the iteration
+    stops. keyword arguments (eg debounce) are passed to JCParser. raises FileNotFoundError
+    if there is no file at fpath and ValueError if it cant be watched for another reason
+    '''
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    parser = await loop.run_in_executor(executor, functools.partial(
+        jcparser.JCParser, fpath, autoupdate=True, snapshot=True, **options))
+    if not parser.watched:
+        # no change would ever be reported
+        if not os.path.isfile(fpath):
+            raise FileNotFoundError(errno.ENOENT, "no config file to watch", fpath)
+        raise ValueError("could not watch config file <{}>".format(fpath))
+
+    def on_change(diff):
+        # runs in the autoupdate daemon
+        loop.call_soon_threadsafe(changed.set)
+    parser.subscribe(on_change)
+
+    try:
+        last = None
+        while 1:
+            snapshot = parser.snapshot
+            if snapshot is not None and snapshot is not last:
+                last = snapshot
+                yield snapshot
+            await changed.wait()
+            changed.clear()
+    finally:
+        parser.unsubscribe(on_change)
+        # unwatching the last file joins the daemon, so dont do it on the loop
+        await loop.run_in_executor(executor, parser.close)
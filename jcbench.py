@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# benchmarks for jcparser on synthetic configs
+# author: Glayn Bukman <glayn@bukman@gmail.com>
+"""
+generate synthetic jerm-config files and time parsing, writing, round trips and autoupdate
+reloads of them.
+
+    python jcbench.py --lines 100000 --depth 4 --json run.json
+    python jcbench.py --lines 100000 --depth 4 --baseline run.json
+
+or from python
+
+    results = run(lines=100000, depth=4)
+"""
+
+__ALL__ = ["generate", "write_config", "run", "main"]
+import os, sys, math, json, random, tempfile, shutil, threading
+
+try:
+    import tracemalloc
+except ImportError: # python2
+    tracemalloc = None
+
+try:
+    from . import jcparser
+except (ImportError, ValueError): # run from the JermConfig directory
+    import jcparser
+
+# environment variable the generated configs expand
+ENV_VAR = "JCBENCH_VALUE"
+
+_timer = jcparser._timer
+
+def generate(lines=10000, depth=3, list_len=10, ref_density=0.1, env_density=0.05, seed=0):
+    '''
+    config text of about `lines` lines made of top-level sections nested `depth` dicts deep.
+    each dict has a few typed values, an [i] list of `list_len` items and its child dict.
+    `ref_density` and `env_density` are the fractions of values that are references to
+    values of earlier sections and $ENV_VAR expansions. the same arguments always give the
+    same text
+    '''
+    rnd = random.Random(seed)
+    out = ["# synthetic config generated by jcbench"]
+    targets = [] # reference paths of values defined so far
+    section = 0
+    while len(out)<lines:
+        name = "s{}".format(section)
+        out.append(name)
+        path = name
+        for level in range(1, depth+1):
+            pad = "    "*level
+            for k in range(3):
+                key = "k{}".format(k)
+                r = rnd.random()
+                if targets and r<ref_density:
+                    out.append("{}{} = `{}`".format(pad, key, rnd.choice(targets)))
+                    continue
+                if r<ref_density+env_density:
+                    out.append("{}{} = ${}".format(pad, key, ENV_VAR))
+                    continue
+                t = k%3
+                if t==0:
+                    out.append("{}{}:i = {}".format(pad, key, rnd.randint(-10**6, 10**6)))
+                elif t==1:
+                    out.append("{}{}:f = {}".format(pad, key, round(rnd.uniform(-1e3, 1e3), 4)))
+                else:
+                    out.append("{}{} = value {}".format(pad, key, rnd.randint(0, 10**6)))
+                if level==1:
+                    targets.append("{}/{}".format(path, key))
+            out.append("{}items[i]".format(pad))
+            out.extend("{}    {}".format(pad, rnd.randint(0, 10**6)) for i in range(list_len))
+            if level<depth:
+                out.append("{}d{}".format(pad, level))
+                path += "/d{}".format(level)
+        section += 1
+    return "\n".join(out)+"\n"
+
+def write_config(fpath, **params):
+    "write generate(**params) to fpath and return the number of lines written"
+    text = generate(**params)
+    with open(fpath, "w") as fout:
+        fout.write(text)
+    return text.count("\n")
+
+def _percentile(values, p):
+    "nearest-rank percentile of the sorted list values"
+    return values[max(0, int(math.ceil(p/100.0*len(values)))-1)]
+
+def _summary(times, lines=None, size=None):
+    '''
+    min/mean/percentiles of a list of timings in seconds and, given the lines and bytes
+    handled per run, the throughput at the median
+    '''
+    times = sorted(times)
+    summary = {
+        "runs": len(times),
+        "min": times[0],
+        "mean": sum(times)/len(times),
+        "p50": _percentile(times, 50),
+        "p90": _percentile(times, 90),
+        "p99": _percentile(times, 99),
+        "max": times[-1],
+    }
+    if lines!=None and summary["p50"]>0:
+        summary["lines_per_s"] = lines/summary["p50"]
+    if size!=None and summary["p50"]>0:
+        summary["mb_per_s"] = size/1e6/summary["p50"]
+    return summary
+
+def _peak_memory(func):
+    "peak bytes traced while func() runs, None without tracemalloc"
+    if tracemalloc==None or tracemalloc.is_tracing():
+        return None
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _timed(func, repeat):
+    times = []
+    for i in range(repeat):
+        started = _timer()
+        func()
+        times.append(_timer()-started)
+    return times
+
+def _parse(fpath, options):
+    parser = jcparser.JCParser(fpath, **options)
+    if not parser.status:
+        raise RuntimeError("benchmark config did not parse: {}".format(parser.errors))
+    return parser
+
+def bench_parse(fpath, lines, repeat=5, **options):
+    "time parsing fpath. keyword arguments are passed to JCParser"
+    size = os.path.getsize(fpath)
+    summary = _summary(_timed(lambda: _parse(fpath, options), repeat), lines, size)
+    summary["peak_bytes"] = _peak_memory(lambda: _parse(fpath, options))
+    return summary
+
+def bench_write(data, fpath, lines, repeat=5):
+    "time writing the parsed `data` to fpath"
+    writer = jcparser.JCParser()
+    times = _timed(lambda: writer.write(data, fpath), repeat)
+    summary = _summary(times, lines, os.path.getsize(fpath))
+    summary["peak_bytes"] = _peak_memory(lambda: writer.write(data, fpath))
+    return summary
+
+def bench_roundtrip(fpath, out_path, lines, repeat=5, **options):
+    "time parsing fpath, writing the result to out_path and parsing that back"
+    def roundtrip():
+        jcparser.JCParser().write(_parse(fpath, options).parsed_data, out_path)
+        _parse(out_path, options)
+    summary = _summary(_timed(roundtrip, repeat), lines, os.path.getsize(fpath))
+    summary["peak_bytes"] = _peak_memory(roundtrip)
+    return summary
+
+def bench_reload(fpath, repeat=5, timeout=10.0, **options):
+    '''
+    latency from rewriting an autoupdated fpath to its subscribers being told, in seconds.
+    each run changes one value at the end of the file
+    '''
+    with open(fpath) as fin:
+        text = fin.read()
+    changed = threading.Event()
+    parser = jcparser.JCParser(fpath, autoupdate=True, snapshot=True, **options)
+    parser.subscribe(lambda diff: changed.set())
+    times = []
+    try:
+        for i in range(repeat):
+            changed.clear()
+            started = _timer()
+            with open(fpath, "w") as fout:
+                fout.write(text+"jcbench_reload:i = {}\n".format(i))
+            if not changed.wait(timeout):
+                raise RuntimeError("config was not reloaded within {}s".format(timeout))
+            times.append(_timer()-started)
+    finally:
+        parser.close()
+        with open(fpath, "w") as fout:
+            fout.write(text)
+    return _summary(times)
+
+def run(lines=10000, depth=3, list_len=10, ref_density=0.1, env_density=0.05, seed=0,
+    repeat=5, reload=True, workdir=None, **options):
+    '''
+    generate a config (see generate) in `workdir` (a temporary directory by default) and
+    benchmark parse, write, round trip and, if `reload` is set, autoupdate reloads of it.
+    returns a dict of the parameters, the config's size and a summary per benchmark: the
+    timings in seconds (min, mean, p50, p90, p99, max), lines_per_s and mb_per_s at the
+    median and peak_bytes traced in one extra run. keyword arguments are passed to JCParser
+    '''
+    params = {"lines": lines, "depth": depth, "list_len": list_len,
+        "ref_density": ref_density, "env_density": env_density, "seed": seed}
+    os.environ.setdefault(ENV_VAR, "jcbench")
+    tmp = workdir or tempfile.mkdtemp(prefix="jcbench-")
+    try:
+        fpath = os.path.join(tmp, "bench.jconf")
+        out_path = os.path.join(tmp, "bench-out.jconf")
+        written = write_config(fpath, **params)
+
+        results = {
+            "params": params,
+            "options": dict((k, repr(v)) for k,v in options.items()),
+            "python": sys.version.split()[0],
+            "config": {"lines": written, "bytes": os.path.getsize(fpath)},
+            "parse": bench_parse(fpath, written, repeat, **options),
+        }
+        data = _parse(fpath, options).parsed_data
+        results["write"] = bench_write(data, out_path, written, repeat)
+        results["roundtrip"] = bench_roundtrip(fpath, out_path, written, repeat, **options)
+        if reload:
+            results["reload"] = bench_reload(fpath, repeat, **options)
+        return results
+    finally:
+        if workdir==None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+def report(results, baseline=None):
+    "the results of run() as text, with the speedup of each median over `baseline` if given"
+    out = ["config: {lines} lines, {bytes} bytes".format(**results["config"])]
+    for name in ("parse", "write", "roundtrip", "reload"):
+        if name not in results:
+            continue
+        r = results[name]
+        line = "{:<10} p50 {:9.2f}ms  p90 {:9.2f}ms  p99 {:9.2f}ms".format(
+            name, r["p50"]*1e3, r["p90"]*1e3, r["p99"]*1e3)
+        if "lines_per_s" in r:
+            line += "  {:11.0f} lines/s  {:7.2f} MB/s".format(r["lines_per_s"], r["mb_per_s"])
+        if r.get("peak_bytes")!=None:
+            line += "  peak {:.1f}MB".format(r["peak_bytes"]/1e6)
+        if baseline and name in baseline and r["p50"]>0:
+            line += "  x{:.2f} vs baseline".format(baseline[name]["p50"]/r["p50"])
+        out.append(line)
+    return "\n".join(out)
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="benchmark jcparser on a synthetic config")
+    ap.add_argument("--lines", type=int, default=10000)
+    ap.add_argument("--depth", type=int, default=3)
+    ap.add_argument("--list-len", type=int, default=10)
+    ap.add_argument("--ref-density", type=float, default=0.1)
+    ap.add_argument("--env-density", type=float, default=0.05)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--no-reload", action="store_true", help="skip the autoupdate benchmark")
+    ap.add_argument("--json", help="save the results to this file")
+    ap.add_argument("--baseline", help="compare with results saved by an earlier --json run")
+    ap.add_argument("--generate", metavar="PATH", help="only write the config to PATH")
+    args = ap.parse_args(argv)
+
+    params = dict(lines=args.lines, depth=args.depth, list_len=args.list_len,
+        ref_density=args.ref_density, env_density=args.env_density, seed=args.seed)
+    if args.generate:
+        print("wrote {} lines to {}".format(write_config(args.generate, **params), args.generate))
+        return
+
+    results = run(repeat=args.repeat, reload=not args.no_reload, **params)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as fin:
+            baseline = json.load(fin)
+    print(report(results, baseline))
+    if args.json:
+        with open(args.json, "w") as fout:
+            json.dump(results, fout, indent=2, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
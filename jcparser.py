@@ -38,6 +38,11 @@ the general format and rules are as follows:
             - provide these special indicators before the actual config starts as they will be
               considered when they are found!
 
+        __include__ PATH puts the keys of the config file at PATH (relative to this file) in
+        the dict it is indented in, eg
+            db
+                __include__ common/db.jconf
+
 4) the type/container comes after the variable eg;
         age:i    declares age as an int
         height:f declares height as a float
@@ -177,8 +182,16 @@ data
 
 """
 
-__ALL__ = ["JCParser", "test"]
-import os, sys
+__ALL__ = ["JCParser", "test", "enable_parse_cache", "disable_parse_cache", "parse_cache_info",
+    "JCStats", "add_stats_hook", "remove_stats_hook", "JCDiagnostic", "JCSchema", "compile_schema", "JCPath",
+    "configure_autoupdate", "stop_autoupdate", "JCSnapshot", "parse_many", "JCLazyData"]
+import os, sys, re, copy, io, json, hashlib, tempfile, struct, bisect, mmap, array, numbers
+from collections import OrderedDict, namedtuple
+import logging
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping # python2
 import threading, time # for when we need to monitor the config file for any automatic updates...
 
 PY_VERSION = sys.version_info[0]
@@ -203,58 +216,1620 @@ HELP = """# this is a comment
 
 TAB_SIZE = 4 # spaces
 
-AUTO_UPDATING = {} # 
+# $ENV_VAR and `reference` tokens in a value. a `\` right before `$` or a backtick escapes it
+_TOKENS = re.compile(r'(?<!\\)\$([A-Za-z0-9_]*)|(?<!\\)`(.*?)(?<!\\)`')
+
+def _scan_tokens(text):
+    '''
+    pull the environment variables and references out of `text` in one pass.
+    returns (env_vars, references); text with neither `$` nor a backtick is not scanned at all
+    '''
+    env_vars, refs = [], []
+    if ('$' not in text) and ('`' not in text):
+        return env_vars, refs
+
+    for match in _TOKENS.finditer(text):
+        if match.lastindex==1:
+            env_vars.append(match.group(1))
+        else:
+            refs.append(match.group(2))
+
+    return env_vars, refs
+
+# a reference path is a /-separated list of keys, each optionally followed by list indices
+# eg `data/types[1]` or `a/b/c[2][0]`
+_REF_PART = re.compile(r'([^\[\]]*?)\s*((?:\[\s*-?\d+\s*\]\s*)*)$')
+_REF_INDEX = re.compile(r'-?\d+')
+_REF_PATHS = {} # compiled reference paths, by reference text
+_REF_PATHS_MAX = 4096
+
+_MISSING = object()
+
+# typecodes of the array.arrays [i] and [f] lists are parsed into with typed_arrays
+_ARRAY_TYPECODES = {"i": "q" if PY_VERSION==3 else "l", "f": "d"} # python2 has no 'q'
+
+_NUMPY = [] # numpy once it has been looked for, None if it is not installed
+
+def _numpy():
+    "numpy or None if it isnt installed. imported on first use as it is slow to import"
+    if not _NUMPY:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _NUMPY.append(numpy)
+    return _NUMPY[0]
+
+def _is_typed_array(value):
+    "is value an array.array or a numpy array"
+    return isinstance(value, array.array) or (
+        type(value).__module__=="numpy" and hasattr(value, "dtype"))
+
+def _array_type(value):
+    "the config type (i or f) of the items of a typed array, None if they are neither"
+    if isinstance(value, array.array):
+        code = value.typecode
+        return "f" if code in "fd" else (None if code=="u" else "i")
+    kind = value.dtype.kind
+    return "i" if kind in "iu" else ("f" if kind=="f" else None)
+
+def _make_array(kind, t, items):
+    '''
+    convert the item strings of a [t] list to a typed array in one go: a numpy array if kind
+    is "numpy", else an array.array. raises if any of them cant be converted
+    '''
+    if kind=="numpy":
+        np = _numpy()
+        return np.array(items, dtype=str).astype(np.int64 if t=="i" else np.float64)
+    return array.array(_ARRAY_TYPECODES[t], map(JCParser.types[t], items))
+
+def _copy_data(value, memo, back=None):
+    '''
+    copy parsed data: its dicts, lists and typed arrays, leaving the immutable values alone.
+    memo maps the id of each container copied so far to its copy (as for copy.deepcopy) so
+    containers shared in `value` are shared in the copy, and `back` (if given) maps the id of
+    each copy to its original. much faster than copy.deepcopy
+    '''
+    if not isinstance(value, (dict, list)) and not _is_typed_array(value):
+        return value
+    copied = memo.get(id(value))
+    if copied is None:
+        if isinstance(value, dict):
+            copied = memo[id(value)] = type(value)()
+            for k in value:
+                copied[k] = _copy_data(value[k], memo, back)
+        elif isinstance(value, list):
+            copied = memo[id(value)] = []
+            copied.extend([_copy_data(item, memo, back) for item in value])
+        else:
+            copied = memo[id(value)] = copy.copy(value)
+        if back!=None:
+            back[id(copied)] = value
+    return copied
+
+def _copy_section(assigned, deps, scopes, memo, back=None):
+    "_copy_data the values a recorded section (see JCParser._parse_sections) holds"
+    return ([(key, _copy_data(value, memo, back)) for key, value in assigned],
+        [(ref, _copy_data(value, memo, back), problem) for ref, value, problem in deps],
+        [[scope[0], _copy_data(scope[1], memo, back)]+scope[2:] for scope in scopes])
+
+# warnings for references that can't be resolved, by _resolve_ref problem
+_REF_PROBLEMS = {
+    "missing": "could not find reference",
+    "not-list": "indexing non-list reference",
+    "index": "index out of range for list reference",
+}
+
+def _compile_ref(ref):
+    '''
+    compile a reference like `data/types[1]` into (steps, head). steps is a tuple of
+    (is_index, key/index) walked from the top of the parsed data and head is the tuple of
+    leading keys that can be looked up in a parse's key index. returns None if the reference
+    is malformed. compiled paths are cached so each reference text is only parsed once
+    '''
+    try:
+        return _REF_PATHS[ref]
+    except KeyError:
+        pass
+
+    steps, head, compiled = [], None, None
+    for part in ref.split('/'):
+        match = _REF_PART.match(part.strip())
+        if not match:
+            break
+        steps.append((False, match.group(1)))
+        indices = _REF_INDEX.findall(match.group(2))
+        if indices and head==None:
+            head = tuple(key for is_index,key in steps)
+        steps.extend((True, int(i)) for i in indices)
+    else:
+        if head==None:
+            head = tuple(key for is_index,key in steps)
+        compiled = (tuple(steps), head)
+
+    if len(_REF_PATHS)>=_REF_PATHS_MAX:
+        _REF_PATHS.clear()
+    _REF_PATHS[ref] = compiled
+    return compiled
+
+def _walk_ref(node, steps, root):
+    '''
+    walk compiled reference steps (see _compile_ref) down from node. root is the top of the
+    data, which can also be a lazily parsed mapping (see JCLazyData). returns (value,
+    problem) like JCParser._resolve_ref
+    '''
+    for is_index, step in steps:
+        if is_index:
+            in_array = _is_typed_array(node)
+            if not (in_array or isinstance(node, list)):
+                return None, "not-list"
+            try:
+                node = node[step]
+            except IndexError:
+                return None, "index"
+            if in_array and hasattr(node, "item"):
+                node = node.item() # numpy scalar to int/float
+        else:
+            if not isinstance(node, dict) and node is not root:
+                return None, "missing"
+            node = node.get(step, _MISSING)
+            if node is _MISSING:
+                return None, "missing"
+
+    return node, None
+
+def _index_set(index, path, value):
+    '''
+    record `value` as defined at key `path` in a parse's key index. redefining a dict drops
+    the index entries of everything that was under it
+    '''
+    old = index.get(path)
+    if isinstance(old, dict) and old is not value:
+        depth = len(path)
+        for stale in [k for k in index if len(k)>depth and k[:depth]==path]:
+            del index[stale]
+    index[path] = value
+
+class _ParseState:
+    '''
+    what parsing carries from one line to the next, so a file can be parsed in pieces (see
+    JCParser._parse_lines): the open scopes, the key index (see _index_set), the default type
+    of the current list and the indent unit. the section_* fields are only set while
+    sections are tracked for incremental reparsing and are None otherwise
+    '''
+    def __init__(_, root):
+        _.root = root
+        _.scopes = [[-1, root, ()]]
+        _.index = {}
+        _.default_type = "s"
+        _.indent_unit = 0
+        _.section_keys = None # top-level keys defined by the section so far, in order
+        _.section_deps = None # (reference, value, problem) resolved outside the section
+        _.section_env = None  # environment variables expanded by the section
+        _.section_includes = None # files included by the section, see JCParser.includes
+        _.pending = {} # typed lists waiting for their arrays, by id (see JCParser._fill_array)
+        _.reported = 0 # diagnostics reported before the current JCParser._parse_lines call
+        _.env_memo = {} # expanded texts (see JCParser._expand_env)
+
+    def define(_, path, value):
+        _index_set(_.index, path, value)
+        if _.section_keys!=None and len(path)==1 and path[0] not in _.section_keys:
+            _.section_keys.append(path[0])
+
+# magic indicator lines, see JCParser._update_indicator
+_MAGIC_WORDS = ("__nonstrictindent__", "__nonstrictsyntax__", "__quiet__")
+# magic line splicing another config file in, see JCParser._include
+_INCLUDE = "__include__"
+
+def _section_starts(data):
+    '''
+    indices of the lines of data that start a top-level section: unindented lines that are
+    not blank, comments or magic indicators. 0 always starts the first section so lines
+    before the first key are part of it
+    '''
+    starts = [0]
+    for i in range(1, len(data)):
+        line = data[i]
+        if line[:1] in (" ", "\t"):
+            continue
+        line = line.strip()
+        if line and line[0]!="#" and line not in _MAGIC_WORDS:
+            starts.append(i)
+    return starts
+
+def _head_key(line):
+    '''
+    the top-level key the stripped, unindented line defines, without parsing it. None if
+    that cant be told up front: the line is malformed or its name depends on environment
+    variables or references
+    '''
+    if "=" in line:
+        key = line[:line.index("=")].strip()
+        if ("{" in key)or("}" in key)or("[" in key)or("]" in key):
+            return None
+        if ":" in key:
+            if len(key)<3 or key[-2]!=":" or key[-1] not in JCParser.types:
+                return None
+            key = key[:-2].strip()
+        return key
+
+    if ("$" in line) or ("`" in line) or (":" in line):
+        return None
+    if ("{" in line)or("}" in line):
+        if (not line.endswith("{}"))or (line.count("{")!=1 or line.count("}")!=1):
+            return None
+        return JCParser.types["{}"](line) or None
+    if ("[" in line)or("]" in line):
+        if line.count("[")!=1 or line.count("]")!=1 or (
+            not [lt for lt in JCParser.list_types if line.endswith(lt)]) or (
+            (line[line.index("[")+1:line.index("]")] or "s") not in JCParser.basic_types):
+            return None
+        return line[:line.index("[")].strip() or None
+    return line
+
+def _lazy_index(data):
+    '''
+    one pass over the lines of a file recording where each top-level section starts and
+    ends and the key it defines, for lazy parsing. returns (preamble_end, sections,
+    first_indented) where sections is a list of (start, end, key) and first_indented the
+    index of the first indented line (it sets the indent unit), or None if the file cant be
+    split up safely and has to be parsed in one go: magic indicators after the first key,
+    indented lines before it or under a top-level key = value, or a section whose key cant
+    be told without parsing it
+    '''
+    sections, first_indented, head_is_value = [], None, False
+    for i in range(len(data)):
+        line = data[i]
+        stripped = line.strip()
+        if (not stripped) or stripped[0]=="#":
+            continue
+        if stripped in _MAGIC_WORDS:
+            if sections:
+                return None
+            continue
+        if stripped.startswith(_INCLUDE):
+            return None # included files are parsed with the whole config
+
+        if line[:1] in (" ", "\t"):
+            if (not sections) or head_is_value:
+                return None
+            if first_indented==None:
+                first_indented = i
+            continue
+
+        key = _head_key(stripped)
+        if key==None:
+            return None
+        if sections:
+            sections[-1][1] = i
+        sections.append([i, len(data), key])
+        head_is_value = "=" in stripped
+
+    preamble_end = sections[0][0] if sections else len(data)
+    return preamble_end, [tuple(sec) for sec in sections], first_indented
+
+class _LazyRoot(dict):
+    '''
+    root container of a section being parsed by JCLazyData. references to top-level keys the
+    section has not defined itself are looked up in the sections before it, which are parsed
+    on demand
+    '''
+    def get(_, key, default=None):
+        if key in _:
+            return dict.__getitem__(_, key)
+        return _.lazy._value_before(key, _.section, default)
 
-def _autoupdate_jconfig():
+class JCLazyData(Mapping):
+    '''
+    parsed data of a config parsed with lazy=True. only the layout of the file is read up
+    front; each top-level section is parsed the first time its key is looked up (or a
+    reference needs it) and is then kept. as in a full parse, a reference only sees the
+    sections before the one it is in. errors and warnings reach the parser as sections are
+    parsed, and a key whose section fails to parse is missing: `in` parses the key's section
+    to tell, while iterating and len() only leave out keys whose sections already failed
+    '''
+    def __init__(_, parser, data, sections, first_indented, indent_unit, flags):
+        _._parser = parser
+        _._data = data
+        _._sections = sections
+        _._first_indented = first_indented
+        _._indent_unit = indent_unit
+        _._flags = flags # magic-indicator state after the preamble
+        _._parsed = {} # section number -> its root container
+        _._lock = threading.RLock()
+
+        _._defs = {} # key -> the sections defining it, in order
+        for i in range(len(sections)):
+            _._defs.setdefault(sections[i][2], []).append(i)
+        _._owner = dict((key, _._defs[key][-1]) for key in _._defs) # the one that counts
+
+    def _section(_, i):
+        root = _._parsed.get(i)
+        if root!=None:
+            return root
+
+        with _._lock:
+            if i in _._parsed:
+                return _._parsed[i]
+
+            start, end, key = _._sections[i]
+            root = _LazyRoot()
+            root.lazy, root.section = _, i
+            st = _ParseState(root)
+            if _._first_indented!=None and _._first_indented<start:
+                st.indent_unit = _._indent_unit
+
+            parser = _._parser
+            # _parse_lines works on the parser's own state, which belongs to whatever it
+            # parsed last, so only the section's errors are left behind
+            saved = (parser.parsed_data, parser.__strictindent__, parser.__strictsyntax__,
+                parser.__verbose__)
+            current = parser.parsed_data is _
+            if not current:
+                diagnostics, texts = list(parser.diagnostics), dict(parser._texts)
+            parser.__strictindent__, parser.__strictsyntax__, parser.__verbose__ = _._flags
+            try:
+                if not parser._parse_lines(_._data[start:end], start, st):
+                    root = {}
+                    if current:
+                        parser.status = False
+            finally:
+                (parser.parsed_data, parser.__strictindent__, parser.__strictsyntax__,
+                    parser.__verbose__) = saved
+                if not current:
+                    parser.diagnostics, parser._texts = diagnostics, texts
+            _._parsed[i] = root
+            return root
+
+    def _has(_, key):
+        "False if `key`s section has been parsed and left it without a value"
+        i = _._owner.get(key)
+        if i==None:
+            return False
+        root = _._parsed.get(i)
+        return root==None or root.get(key, _MISSING) is not _MISSING
+
+    def _value_before(_, key, section, default):
+        "value of top-level `key` as defined by the last section before `section`"
+        defs = _._defs.get(key, ())
+        i = bisect.bisect_left(defs, section)
+        if not i:
+            return default
+        return _._section(defs[i-1]).get(key, default)
+
+    def __getitem__(_, key):
+        i = _._owner[key]
+        value = _._section(i).get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(_):
+        return iter([k for k in _._owner if _._has(k)])
+
+    def __len__(_):
+        return len([k for k in _._owner if _._has(k)])
+
+    def __contains__(_, key):
+        if key not in _._owner:
+            return False
+        _._section(_._owner[key])
+        return _._has(key)
+
+    def loaded(_):
+        "keys whose sections have been parsed so far"
+        return [k for k in _._owner if _._owner[k] in _._parsed]
+
+    def load_all(_):
+        "parse every section that hasnt been and return all the data as a plain dict"
+        data = {}
+        for key in _:
+            value = _.get(key, _MISSING)
+            if value is not _MISSING:
+                data[key] = value
+        return data
+
+    def __repr__(_):
+        return "JCLazyData({} keys, {} loaded)".format(len(_), len(_.loaded()))
+
+# files at least this big are memory-mapped by parse() unless use_mmap says otherwise
+MMAP_THRESHOLD = 32*1024*1024
+
+_NOT_BLANK = re.compile(br"[^ \t\r\n\f\v]")
+_LINE_END = re.compile(br"\r\n?|\n")
+
+def _mmap_lines(mm, size):
+    '''
+    generate the lines of a memory-mapped file, each decoded straight from the map only when
+    the parser gets to it, so the file is never held as a list of lines. blank and comment
+    lines are found by searching the map and come out as "" without being decoded. lines end
+    at "\n", "\r\n" or a lone "\r" like with universal newlines, the last two only searched
+    for when the file has a "\r" at all
+    '''
+    view = memoryview(mm) if PY_VERSION==3 else mm # python2 parses bytes lines anyway
+    find, search, pos = mm.find, _NOT_BLANK.search, 0
+    line_end = _LINE_END.search if find(b"\r")>=0 else None
+    try:
+        while pos<size:
+            if line_end==None:
+                end = find(b"\n", pos)
+                end = size if end<0 else end+1
+            else:
+                match = line_end(mm, pos)
+                end = size if match==None else match.end()
+            match = search(mm, pos, end)
+            if match==None or mm[match.start():match.start()+1]==b"#":
+                yield ""
+            else:
+                yield str(view[pos:end], "utf-8") if PY_VERSION==3 else view[pos:end]
+            pos = end
+    finally:
+        if PY_VERSION==3:
+            view.release()
+
+def _file_identity(fpath):
+    '''
+    (realpath, mtime in ns, size, inode) of fpath or None if it cant be stat'ed. any edit,
+    replace or rename-over of the file changes at least one of these
+    '''
+    try:
+        st = os.stat(fpath)
+    except OSError:
+        return None
+    mtime = getattr(st, "st_mtime_ns", None)
+    if mtime==None:
+        mtime = int(st.st_mtime*1e9) # python2
+    return (os.path.realpath(fpath), mtime, st.st_size, st.st_ino)
+
+def _includes_changed(includes):
+    "True if a file in includes (see JCParser.includes) is not the same file anymore"
+    for path in includes:
+        if _file_identity(path)!=includes[path]:
+            return True
+    return False
+
+# parsed __include__ files by (real path, typed array kind), so a fragment shared by many
+# configs is parsed once per process. see JCParser._fragment
+_FRAGMENTS = {}
+_FRAGMENTS_MAX = 256
+_FRAGMENTS_LOCK = threading.Lock()
+
+class _ParseCache:
+    '''
+    LRU cache of successful parses keyed on file identity (see _file_identity). an entry is
+    weighed by the size of its source file, which is what `max_bytes` caps. entries hold a
+    private copy of the parsed data and hits hand out a fresh copy, so callers can never
+    mutate what is cached. an entry is only a hit while the environment variables its parse
+    expanded keep their values and the files it included are unchanged
+    '''
+    def __init__(_):
+        _.enabled = False
+        _.max_entries = 0
+        _.max_bytes = None
+        _.lock = threading.Lock()
+        _.clear()
+
+    def clear(_):
+        _.entries = OrderedDict()
+        _.bytes = 0
+        _.hits = 0
+        _.misses = 0
+
+    def get(_, key, environ):
+        with _.lock:
+            entry = _.entries.get(key)
+            if entry==None or _env_changed(entry[3], environ) or _includes_changed(entry[4]):
+                _.misses += 1
+                return None
+            _.hits += 1
+            # move to the most-recently-used end
+            del _.entries[key]
+            _.entries[key] = entry
+        return copy.deepcopy(entry[0]), list(entry[1]), dict(entry[3]), dict(entry[4])
+
+    def put(_, key, data, diagnostics, env_deps, includes):
+        size = key[2]
+        if _.max_bytes!=None and size>_.max_bytes:
+            return
+        data = copy.deepcopy(data)
+        with _.lock:
+            if key in _.entries:
+                _.bytes -= _.entries.pop(key)[2]
+            _.entries[key] = (data, tuple(diagnostics), size, dict(env_deps), dict(includes))
+            _.bytes += size
+            while _.entries and (len(_.entries)>_.max_entries or (
+                _.max_bytes!=None and _.bytes>_.max_bytes)):
+                _.bytes -= _.entries.popitem(last=False)[1][2]
+
+_PARSE_CACHE = _ParseCache()
+
+def enable_parse_cache(max_entries=128, max_bytes=None):
+    '''
+    cache successful parses in this process so parsing an unchanged file again hands back
+    a copy of the earlier result instead of re-reading it. the least recently used entries
+    are evicted once there are more than `max_entries` of them or their source files add up
+    to more than `max_bytes` (no byte limit if None)
+    '''
+    with _PARSE_CACHE.lock:
+        _PARSE_CACHE.max_entries = max_entries
+        _PARSE_CACHE.max_bytes = max_bytes
+        _PARSE_CACHE.enabled = max_entries>0
+    if not _PARSE_CACHE.enabled:
+        disable_parse_cache()
+
+def disable_parse_cache():
+    "stop caching parses and drop everything cached so far, including the hit/miss counters"
+    with _PARSE_CACHE.lock:
+        _PARSE_CACHE.enabled = False
+        _PARSE_CACHE.clear()
+
+def parse_cache_info():
+    "hit/miss counters and current size of the parse cache, for sizing it"
+    with _PARSE_CACHE.lock:
+        return {
+            "enabled": _PARSE_CACHE.enabled,
+            "hits": _PARSE_CACHE.hits,
+            "misses": _PARSE_CACHE.misses,
+            "entries": len(_PARSE_CACHE.entries),
+            "bytes": _PARSE_CACHE.bytes,
+            "max_entries": _PARSE_CACHE.max_entries,
+            "max_bytes": _PARSE_CACHE.max_bytes,
+        }
+
+# on-disk cache files start with this header, naming the version of their format. the rest
+# is json, which any python can read and loading it runs no code whoever wrote the file
+_DISK_CACHE_MAGIC = b"JCC4\n"
+
+def _source_hash(raw):
+    if hasattr(hashlib, "blake2b"):
+        return hashlib.blake2b(raw, digest_size=20).hexdigest()
+    return hashlib.sha1(raw).hexdigest() # python2
+
+def _content_hash(fpath, includes, digest=None):
+    '''
+    what a reload of fpath would read: the _source_hash of fpath (`digest` if that is already
+    known) and of each of the files it includes. None if one of them cant be read
+    '''
+    try:
+        if digest==None:
+            with open(fpath, "rb") as fin:
+                digest = _source_hash(fin.read())
+        hashes = []
+        for path in sorted(includes):
+            with open(path, "rb") as fin:
+                hashes.append((path, _source_hash(fin.read())))
+    except (IOError, OSError):
+        return None
+    return digest, tuple(hashes)
+
+def _disk_cache_path(fpath, cache_dir):
+    '''
+    where the compiled cache of fpath lives. with cache_dir=True this is a hidden sidecar
+    next to the config (.NAME.jcc), otherwise a file in cache_dir named after the config's
+    real path so configs with the same name in different directories dont collide
+    '''
+    name = os.path.basename(fpath)
+    if cache_dir==True:
+        return os.path.join(os.path.dirname(fpath), ".{}.jcc".format(name))
+    tag = hashlib.sha1(os.path.realpath(fpath).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, "{}-{}.jcc".format(tag, name))
+
+def _env_changed(env_deps, environ):
+    "True if a variable in env_deps (see JCParser.env_deps) has another value in `environ`"
+    for var in env_deps:
+        if environ.get(var)!=env_deps[var]:
+            return True
+    return False
+
+def _load_disk_cache(cpath, src_hash, environ):
+    '''
+    (parsed_data, diagnostics, env_deps, includes) from the cache file at cpath if it was
+    compiled from source with hash `src_hash`, every environment variable it expanded still
+    has the same value in the mapping `environ` and the files it included are unchanged,
+    else None
+    '''
+    try:
+        with open(cpath, "rb") as fin:
+            if fin.readline()!=_DISK_CACHE_MAGIC:
+                return None
+            cached_hash, env_deps, includes, diagnostics, data = json.loads(
+                fin.read().decode("utf-8"), object_hook=_unpack_array)
+            # json has no tuples
+            includes = dict((path, tuple(identity) if isinstance(identity, list) else identity)
+                for path, identity in includes.items())
+            diagnostics = [JCDiagnostic(*(d[:5]+[tuple(d[5]) if d[5]!=None else None]))
+                for d in diagnostics]
+    except Exception: # missing, unreadable or corrupt cache files are just misses
+        return None
+
+    if cached_hash!=src_hash or _env_changed(env_deps, environ) or _includes_changed(includes):
+        return None
+
+    return data, diagnostics, env_deps, includes
+
+def _replace(src, dst):
+    if hasattr(os, "replace"):
+        os.replace(src, dst)
+    else:
+        os.rename(src, dst) # python2, not atomic on windows
+
+def _atomic_write(fpath, raw):
+    '''
+    write bytes `raw` to a temporary file in fpath's directory, fsync it and rename it over
+    fpath, so fpath always holds either the old or the new contents. an existing fpath keeps
+    its permissions. a symlinked fpath stays a link: the file it points to is replaced.
+    returns False if the file could not be written
+    '''
+    fpath = os.path.realpath(fpath)
+    tmp = os.path.join(os.path.dirname(fpath) or ".", ".{}.{}.{}.tmp".format(
+        os.path.basename(fpath), os.getpid(), threading.current_thread().ident))
+    try:
+        # 0666 like open(), less the umask
+        fd = os.open(tmp, os.O_WRONLY|os.O_CREAT|os.O_TRUNC|getattr(os, "O_BINARY", 0), 0o666)
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, "wb") as fout:
+            fout.write(raw)
+            fout.flush()
+            os.fsync(fout.fileno())
+        if os.path.exists(fpath):
+            os.chmod(tmp, os.stat(fpath).st_mode & 0o7777)
+        _replace(tmp, fpath)
+    except (OSError, IOError):
+        try: os.remove(tmp)
+        except OSError: pass
+        return False
+    return True
+
+def _save_disk_cache(cpath, src_hash, env_deps, includes, diagnostics, data):
+    "write a cache file next to cpath and rename it into place. failures are ignored"
+    cdir = os.path.dirname(cpath) or "."
+    try:
+        if not os.path.isdir(cdir):
+            os.makedirs(cdir)
+        fd, tmp = tempfile.mkstemp(dir=cdir, prefix=".jcc-")
+    except (OSError, IOError):
+        return
+    try:
+        with os.fdopen(fd, "wb") as fout:
+            fout.write(_DISK_CACHE_MAGIC)
+            fout.write(json.dumps([src_hash, env_deps, includes, [list(d) for d in diagnostics],
+                data], separators=(",", ":")).encode("utf-8"))
+        _replace(tmp, cpath)
+    except Exception:
+        try: os.remove(tmp)
+        except OSError: pass
+
+_ARRAY_TAG = "\0array"
+
+def _pack_arrays(value):
+    '''
+    copy of parsed data with each typed array in it replaced by a dict json can store:
+    {_ARRAY_TAG: [is it numpy, typecode or dtype, its items]}. see _unpack_array
+    '''
+    if isinstance(value, dict):
+        return dict((k, _pack_arrays(v)) for k,v in value.items())
+    if isinstance(value, list):
+        return [_pack_arrays(v) for v in value]
+    if isinstance(value, array.array):
+        return {_ARRAY_TAG: [False, value.typecode, value.tolist()]}
+    if _is_typed_array(value):
+        return {_ARRAY_TAG: [True, value.dtype.str, value.tolist()]}
+    return value
+
+def _unpack_array(obj):
+    "json object_hook undoing _pack_arrays. no config key has a NUL in it"
+    if len(obj)!=1 or _ARRAY_TAG not in obj:
+        return obj
+    is_numpy, code, items = obj[_ARRAY_TAG]
+    if is_numpy:
+        np = _numpy()
+        return np.array(items, dtype=np.dtype(code))
+    return array.array(str(code), items)
+
+# inotify(7) flags. directories are watched rather than the files themselves so saves that
+# write a temp file and rename it over the config are seen too
+_IN_MODIFY, _IN_ATTRIB, _IN_CLOSE_WRITE, _IN_MOVED_FROM, _IN_MOVED_TO = 0x2, 0x4, 0x8, 0x40, 0x80
+_IN_DELETE, _IN_DELETE_SELF, _IN_Q_OVERFLOW, _IN_IGNORED = 0x200, 0x400, 0x4000, 0x8000
+_IN_WATCH_MASK = _IN_MODIFY|_IN_ATTRIB|_IN_CLOSE_WRITE|_IN_MOVED_FROM|_IN_MOVED_TO|_IN_DELETE| \
+    _IN_DELETE_SELF
+_IN_NONBLOCK, _IN_CLOEXEC = 0o4000, 0o2000000
+_STRUCT_INOTIFY_EVENT = struct.Struct("iIII") # wd, mask, cookie, len; then len bytes of name
+
+class _PollWatcher:
+    '''
+    portable watcher for the autoupdate daemon; it just sleeps and asks for every watched
+    file to be stat'ed. the sleep starts at `interval` and doubles up to `max_interval` for as
+    long as nothing changes. with max_interval==interval this is a plain fixed-rate poll
+    '''
+    def __init__(_, interval=0.1, max_interval=1.0):
+        _.min_interval = _.interval = interval
+        _.max_interval = max(interval, max_interval)
+        _.event = threading.Event()
+
+    def add(_, fpath): pass
+    def remove(_, fpath): pass
+    def close(_): pass
+
+    def wake(_):
+        _.event.set()
+
+    def wait(_, timeout=None):
+        '''
+        block until the next check is due, or for at most `timeout` seconds. returns None as
+        any watched file may have changed
+        '''
+        _.event.wait(_.interval if timeout==None else min(_.interval, timeout))
+        _.event.clear()
+        return None
+
+    def changed(_, found):
+        _.interval = _.min_interval if found else min(_.interval*2, _.max_interval)
+
+def _link_targets(fpath, max_links=40):
+    '''
+    (directory, name) of each symlink met while resolving fpath, the links to directories on
+    the way included, and of the file it ends at. the directories are real paths. a
+    retargeted link (eg the ..data link of a kubernetes ConfigMap volume) changes an entry
+    in one of those directories
+    '''
+    targets, current, links = [], os.sep, 0
+    todo = os.path.abspath(fpath).split(os.sep)
+    while todo:
+        part = todo.pop(0)
+        if part in ("", "."):
+            continue
+        if part=="..":
+            current = os.path.dirname(current)
+            continue
+        path = os.path.join(current, part)
+        try:
+            link = os.readlink(path) if links<max_links else None
+        except OSError: # not a link, or missing
+            link = None
+        if link==None:
+            current = path
+            continue
+        links += 1
+        if (current, part) not in targets:
+            targets.append((current, part))
+        if os.path.isabs(link):
+            current = os.sep
+        todo[:0] = link.split(os.sep)
+    if current!=os.sep:
+        target = os.path.split(current)
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+class _InotifyWatcher:
+    '''
+    linux watcher that blocks on inotify events for the directories holding the watched
+    files and the symlinks leading to them, through ctypes so there are no dependencies.
+    wait() only returns when one of those directories changed (or wake() was called) and
+    names the watched files that were touched. the links of a touched file are followed again
+    so a retargeted link moves its watches; a file whose directories cant all be watched (eg
+    one that is gone for now) is polled every `interval` seconds until they can
+    '''
+    def __init__(_, interval=0.1):
+        import ctypes, ctypes.util, select
+        _.select = select.select
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        _.add_watch, _.rm_watch = libc.inotify_add_watch, libc.inotify_rm_watch
+        _.fd = libc.inotify_init1(_IN_NONBLOCK|_IN_CLOEXEC)
+        if _.fd<0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        _.wake_r, _.wake_w = os.pipe()
+        _.lock = threading.Lock()
+        _.dirs = {}  # watched directory -> watch descriptor
+        _.wds = {}   # watch descriptor -> watched directory
+        _.names = {} # (directory, file name) -> registered paths
+        _.paths = {} # registered path -> its _link_targets when last followed
+        _.polled = set() # registered paths some of whose directories arent watched
+        _.interval = interval
+        _.buffer = b""
+
+    def _watch(_, fpath):
+        "watch what fpath resolves through now instead of what it did. call with _.lock held"
+        old, new = _.paths.get(fpath, ()), _link_targets(fpath)
+        polled = False
+        for d,name in new:
+            if d not in _.dirs:
+                wd = _.add_watch(_.fd, d.encode(sys.getfilesystemencoding()), _IN_WATCH_MASK)
+                if wd<0:
+                    polled = True
+                    continue
+                _.dirs[d], _.wds[wd] = wd, d
+            _.names.setdefault((d,name), set()).add(fpath)
+        _.paths[fpath] = new
+        for target in old:
+            if target not in new:
+                _._drop(fpath, target)
+        if polled:
+            _.polled.add(fpath)
+        else:
+            _.polled.discard(fpath)
+
+    def _drop(_, fpath, target):
+        "stop watching target for fpath. call with _.lock held"
+        d = target[0]
+        paths = _.names.get(target)
+        if paths:
+            paths.discard(fpath)
+            if not paths:
+                del _.names[target]
+        if d in _.dirs and not [k for k in _.names if k[0]==d]:
+            wd = _.dirs.pop(d)
+            del _.wds[wd]
+            _.rm_watch(_.fd, wd)
+
+    def add(_, fpath):
+        with _.lock:
+            _._watch(fpath)
+
+    def remove(_, fpath):
+        with _.lock:
+            for target in _.paths.pop(fpath, ()):
+                _._drop(fpath, target)
+            _.polled.discard(fpath)
+
+    def wake(_):
+        try: os.write(_.wake_w, b"x")
+        except OSError: pass
+
+    def wait(_, timeout=None):
+        '''
+        block until a watched directory changes, or for at most `timeout` seconds. returns
+        the watched paths that may have changed
+        '''
+        if _.polled:
+            timeout = _.interval if timeout==None else min(timeout, _.interval)
+        readable = _.select([_.fd, _.wake_r], [], [], timeout)[0]
+        if _.wake_r in readable:
+            os.read(_.wake_r, 4096)
+
+        with _.lock:
+            changed = set(_.polled)
+            for fpath in changed:
+                _._watch(fpath)
+        if _.fd not in readable:
+            return changed
+
+        while 1:
+            try:
+                chunk = os.read(_.fd, 65536)
+            except OSError: # EAGAIN, nothing left to read
+                break
+            if not chunk:
+                break
+            _.buffer += chunk
+
+        with _.lock:
+            offset = 0
+            while offset+16<=len(_.buffer):
+                wd, mask, cookie, length = _STRUCT_INOTIFY_EVENT.unpack_from(_.buffer, offset)
+                if offset+16+length>len(_.buffer):
+                    break
+                name = _.buffer[offset+16:offset+16+length].rstrip(b"\0")
+                offset += 16+length
+
+                if mask&_IN_Q_OVERFLOW:
+                    _.buffer = b""
+                    for fpath in list(_.paths):
+                        _._watch(fpath)
+                    return None # events were lost, check everything
+                d = _.wds.get(wd)
+                if d==None:
+                    continue
+                if mask&(_IN_DELETE_SELF|_IN_IGNORED):
+                    # the directory itself went away
+                    for key in [k for k in _.names if k[0]==d]:
+                        changed.update(_.names[key])
+                    if mask&_IN_IGNORED: # and so did its watch
+                        del _.wds[wd]
+                        if _.dirs.get(d)==wd:
+                            del _.dirs[d]
+                    continue
+                key = (d, name.decode(sys.getfilesystemencoding(), "replace"))
+                changed.update(_.names.get(key, ()))
+            _.buffer = _.buffer[offset:]
+
+            # follow the links again, the touched entries may have been links
+            for fpath in changed:
+                if fpath in _.paths:
+                    _._watch(fpath)
+
+        return changed
+
+    def changed(_, found): pass
+
+    def close(_):
+        for fd in (_.fd, _.wake_r, _.wake_w):
+            try: os.close(fd)
+            except OSError: pass
+
+# which watcher the autoupdate daemon uses: "inotify", "poll" or "auto" (inotify where available)
+AUTOUPDATE_BACKEND = "auto"
+# seconds between checks of the poll watcher, backing off to AUTOUPDATE_MAX_INTERVAL while idle
+AUTOUPDATE_INTERVAL = 0.1
+AUTOUPDATE_MAX_INTERVAL = 1.0
+
+def _make_watcher():
+    if AUTOUPDATE_BACKEND in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return _InotifyWatcher(AUTOUPDATE_INTERVAL)
+        except Exception:
+            if AUTOUPDATE_BACKEND=="inotify":
+                raise
+    return _PollWatcher(AUTOUPDATE_INTERVAL, AUTOUPDATE_MAX_INTERVAL)
+
+# watched path -> list of one entry per parser watching it: {'obj': JCParser, 'identity':
+# _watch_identity when last looked at, 'due': time a debounced reload is due or None,
+# 'debounce', 'content_hash' and 'hash': the registration's options and the source hash at the
+# last reload, 'includes': the JCParser.includes of the last parse, which are watched too}
+AUTO_UPDATING = {}
+_AUTO_UPDATING_LOCK = threading.RLock()
+
+# the running daemon's watcher and thread. the daemon is only started by the first autoupdate
+# registration and stops once nothing is watched anymore
+_WATCHER = None
+_jconf_auto_update_daemon = None
+
+def _start_autoupdate():
+    "start the daemon if it isnt running. call with _AUTO_UPDATING_LOCK held"
+    global _WATCHER, _jconf_auto_update_daemon
+    if _WATCHER!=None:
+        return
+    _WATCHER = _make_watcher()
+    _WATCHER.stopped = False
+    for fpath in AUTO_UPDATING:
+        _WATCHER.add(fpath)
+        for entry in AUTO_UPDATING[fpath]:
+            for path in entry['includes']:
+                _WATCHER.add(path)
+    _jconf_auto_update_daemon = threading.Thread(target=_autoupdate_jconfig, args=(_WATCHER,))
+    _jconf_auto_update_daemon.daemon = True
+    _jconf_auto_update_daemon.start()
+
+def _stop_autoupdate():
+    '''
+    tell the daemon to exit (it closes its watcher on the way out) and return its thread.
+    call with _AUTO_UPDATING_LOCK held
+    '''
+    global _WATCHER, _jconf_auto_update_daemon
+    thread = _jconf_auto_update_daemon
+    if _WATCHER!=None:
+        _WATCHER.stopped = True
+        _WATCHER.wake()
+    _WATCHER = _jconf_auto_update_daemon = None
+    return thread
+
+def _join(thread, timeout=5):
+    if thread!=None and thread is not threading.current_thread():
+        thread.join(timeout)
+
+def _unwatch(fpath, entry):
+    "drop the watch entry of fpath. call with _AUTO_UPDATING_LOCK held"
+    entries = AUTO_UPDATING[fpath]
+    entries[:] = [e for e in entries if e is not entry]
+    if not entries:
+        del AUTO_UPDATING[fpath]
+        if _WATCHER!=None:
+            _WATCHER.remove(fpath)
+    _set_includes(entry, {})
+    if not AUTO_UPDATING:
+        return _stop_autoupdate()
+
+def configure_autoupdate(backend=None, interval=None, max_interval=None):
+    '''
+    change how the autoupdate daemon watches files; arguments left as None are unchanged.
+    backend is "auto", "inotify" or "poll". interval is how often the poll watcher checks the
+    files and max_interval how far it backs off to while they dont change. a running daemon
+    is restarted with the new settings
+    '''
+    global AUTOUPDATE_BACKEND, AUTOUPDATE_INTERVAL, AUTOUPDATE_MAX_INTERVAL
+    with _AUTO_UPDATING_LOCK:
+        if backend!=None:
+            AUTOUPDATE_BACKEND = backend
+        if interval!=None:
+            AUTOUPDATE_INTERVAL = interval
+        if max_interval!=None:
+            AUTOUPDATE_MAX_INTERVAL = max_interval
+
+        thread = None
+        if _WATCHER!=None:
+            thread = _stop_autoupdate()
+            _start_autoupdate()
+    _join(thread)
+
+def stop_autoupdate():
+    "stop autoupdating every watched file and shut the daemon down"
+    with _AUTO_UPDATING_LOCK:
+        AUTO_UPDATING.clear()
+        thread = _stop_autoupdate()
+    _join(thread)
+
+def _after_fork_in_child():
+    # the daemon thread does not survive a fork and the parent's watches are the parent's. the
+    # child starts with none and no daemon, which starts once the child registers a watch
+    global _WATCHER, _jconf_auto_update_daemon
+    AUTO_UPDATING.clear()
+    _AUTO_UPDATING_LOCK.release()
+    if _WATCHER!=None:
+        _WATCHER.close()
+    _WATCHER = _jconf_auto_update_daemon = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_AUTO_UPDATING_LOCK.acquire,
+        after_in_parent=_AUTO_UPDATING_LOCK.release,
+        after_in_child=_after_fork_in_child)
+
+def _watch_identity(fpath, includes):
+    '''
+    what tells an autoupdated file has changed: the _file_identity of fpath and of each of
+    the files it includes (see JCParser.includes)
+    '''
+    return (_file_identity(fpath), tuple(sorted((path, _file_identity(path)) for path in includes)))
+
+def _set_includes(entry, includes):
+    '''
+    watch the files in `includes` for the watch `entry` instead of the ones it watched so far,
+    leaving alone files other watches need. call with _AUTO_UPDATING_LOCK held
+    '''
+    old, entry['includes'] = entry['includes'], dict(includes)
+    if _WATCHER==None:
+        return
+    for path in includes:
+        if path not in old:
+            _WATCHER.add(path)
+    for path in old:
+        if path not in includes and path not in AUTO_UPDATING and not [
+            e for entries in AUTO_UPDATING.values() for e in entries
+            if e is not entry and path in e['includes']]:
+            _WATCHER.remove(path)
+
+def _check_autoupdated(fpath, entry, now):
+    '''
+    reload fpath if its identity or that of a file it includes changed since it was last
+    looked at. with a debounce window
+    on the watch the reload waits until the file has been left alone for that long, so a
+    burst of writes costs one parse. with content hashing the parse is skipped if the bytes
+    are the same as at the last reload. returns True if the file changed or a reload is
+    still pending
+    '''
+    identity = _watch_identity(fpath, entry['includes'])
+    if identity!=entry['identity']:
+        entry['identity'] = identity
+        entry['due'] = now+entry['debounce']
+
+    due = entry['due']
+    if due==None:
+        return False
+    if due>now:
+        return True
+    entry['due'] = None
+
+    if entry['content_hash']:
+        # an included file that changed is reloaded even if fpath's bytes did not
+        src_hash = _content_hash(fpath, entry['includes'])
+        if src_hash!=None and src_hash==entry['hash']:
+            return True
+        entry['hash'] = src_hash
+
+    _reload_autoupdated(fpath, entry)
+    return True
+
+def _reload_autoupdated(fpath, entry):
+    '''
+    reparse fpath and publish the result to the watching parser and its container if it
+    parsed without errors and its data changed
+    '''
+    pobj = JCParser(verbose=False, typed_arrays=entry['obj'].typed_arrays,
+        stats=entry['obj'].collect_stats, env=entry['obj'].env, schema=entry['obj'].schema)
+    pobj._track_sections, pobj._sections = True, entry['obj']._sections
+    pobj.parse(fpath)
+    if pobj.status:
+        entry['obj']._sections = pobj._sections
+        entry['obj'].parsed_data = pobj.parsed_data
+        entry['obj'].status = pobj.status
+        entry['obj'].diagnostics = pobj.diagnostics
+        entry['obj'].env_deps = pobj.env_deps
+        entry['obj'].includes = pobj.includes
+        entry['obj'].stats = pobj.stats
+        with _AUTO_UPDATING_LOCK:
+            # the files included now, as they were when they were read
+            entry['identity'] = (entry['identity'][0], tuple(sorted(pobj.includes.items())))
+            _set_includes(entry, pobj.includes)
+            if entry['content_hash']:
+                entry['hash'] = _content_hash(fpath, pobj.includes, pobj._source_digest)
+        entry['obj']._publish(changes_only=True)
+
+def _next_due():
+    "seconds until the earliest debounced reload is due, None if none is pending"
+    with _AUTO_UPDATING_LOCK:
+        dues = [e['due'] for entries in AUTO_UPDATING.values() for e in entries
+            if e['due']!=None]
+    return max(0, min(dues)-time.time()) if dues else None
+
+def _autoupdate_jconfig(watcher):
     '''
     daemon that monitors all config files that needs autoupdating and 
-    autoupdates em when their last modification time changes...
+    autoupdates em when they change. it sleeps in the watcher until one of the watched files
+    may have changed (see _InotifyWatcher and _PollWatcher) or a debounced reload is due and
+    exits when the watcher is stopped
     
     this function should be run as a separate thread, OBVIOUSLY
     '''
-    
-    global AUTO_UPDATING
-    pobj, obsolete = None, []
-    while 1:
-        obsolete = []
-                
-        try: 'x' in AUTO_UPDATING
-        except: return # calling thread perhaps is dead
-
-        for fpath in AUTO_UPDATING:
+    while not watcher.stopped:
+        changed = watcher.wait(_next_due())
+        if watcher.stopped:
+            break
+
+        now = time.time()
+        with _AUTO_UPDATING_LOCK:
+            # every parser watching a file reloads it with its own options
+            watches = [(f, e) for f in AUTO_UPDATING for e in AUTO_UPDATING[f]
+                if changed==None or f in changed or e['due']!=None or
+                    not changed.isdisjoint(e['includes'])]
+
+        found, obsolete = False, []
+        for fpath, entry in watches:
+            with _AUTO_UPDATING_LOCK:
+                if not [e for e in AUTO_UPDATING.get(fpath, ()) if e is entry]:
+                    continue
             if not os.path.isfile(fpath):
                 obsolete.append(fpath)
                 continue
-                
-            if ('mtime' not in AUTO_UPDATING[fpath]) or (
-                os.stat(fpath).st_mtime != AUTO_UPDATING[fpath]['mtime']):
-                    
-                pobj = JCParser(fpath, verbose=False)
-                if pobj.status:
-                    AUTO_UPDATING[fpath]['obj'].parsed_data = pobj.parsed_data
-                    AUTO_UPDATING[fpath]['obj'].status = pobj.status
-                    AUTO_UPDATING[fpath]['obj'].warnings = pobj.warnings
-                    AUTO_UPDATING[fpath]['obj'].errors = pobj.errors
-                    AUTO_UPDATING[fpath]['mtime'] = os.stat(fpath).st_mtime
-                    
-                    AUTO_UPDATING[fpath]['obj'].container.clear()
-                    for k in pobj.parsed_data:
-                        AUTO_UPDATING[fpath]['obj'].container[k] = pobj.parsed_data[k]
-                    
-        
-        for fpath in obsolete:
-            print('deleting obsolete autp-update paths: {}'.format(fpath))
-            del AUTO_UPDATING[fpath]
+            found = _check_autoupdated(fpath, entry, now) or found
 
-        time.sleep(0.1) # time delay for checking if a config file's been updated
+        with _AUTO_UPDATING_LOCK:
+            for fpath in set(obsolete):
+                if fpath in AUTO_UPDATING and not os.path.isfile(fpath):
+                    _LOG.info("stopped autoupdating %s, it was deleted", fpath)
+                    for entry in list(AUTO_UPDATING[fpath]):
+                        _unwatch(fpath, entry)
+
+        watcher.changed(found or bool(obsolete))
+
+    watcher.close()
     
+def _diff_paths(old, new, path, diff):
+    '''
+    add the key paths (in reference syntax eg data/types[1]) at which `new` differs from `old`
+    to diff["added"], diff["removed"] and diff["changed"]
+    '''
+    if _is_typed_array(old):
+        old = old.tolist()
+    if _is_typed_array(new):
+        new = new.tolist()
+    if isinstance(old, dict) and isinstance(new, dict):
+        prefix = path+"/" if path else ""
+        for k in old:
+            if k in new:
+                _diff_paths(old[k], new[k], prefix+k, diff)
+            else:
+                diff["removed"].append(prefix+k)
+        for k in new:
+            if k not in old:
+                diff["added"].append(prefix+k)
+    elif isinstance(old, list) and isinstance(new, list):
+        for i in range(min(len(old), len(new))):
+            _diff_paths(old[i], new[i], "{}[{}]".format(path, i), diff)
+        for i in range(len(new), len(old)):
+            diff["removed"].append("{}[{}]".format(path, i))
+        for i in range(len(old), len(new)):
+            diff["added"].append("{}[{}]".format(path, i))
+    elif type(old)!=type(new) or old!=new:
+        diff["changed"].append(path)
+
+class JCSnapshot(Mapping):
+    '''
+    read-only mapping over one successful parse of a config. an autoupdated parser created
+    with snapshot=True publishes a new snapshot on every reload by swapping a single
+    reference, so a reader that grabs `parser.snapshot` once sees one whole config for as long
+    as it holds on to it, without locks. `generation` counts the parses published so far.
+
+    only the top level is read-only; nested dicts and lists are the parsed objects themselves
+    and must not be modified
+    '''
+    __slots__ = ("_data", "generation")
+
+    def __init__(_, data, generation):
+        _._data = data
+        _.generation = generation
+
+    def __getitem__(_, key):
+        return _._data[key]
+
+    def __iter__(_):
+        return iter(_._data)
+
+    def __len__(_):
+        return len(_._data)
+
+    def __contains__(_, key):
+        return key in _._data
+
+    def __repr__(_):
+        return "JCSnapshot(generation={}, {!r})".format(_.generation, _._data)
+
+class JCPath(object):
+    '''
+    a path into a parser's data (see JCParser.compile_path) that is parsed once rather than on
+    every lookup. path(default) or path.get(default) is the value at the path, or default if
+    there is none. with `cache` the value is also kept until the parser publishes its next
+    parse (see JCSnapshot.generation) or its data is replaced otherwise (eg emptied by a
+    failed parse), so it is only looked up again after a reload
+    '''
+    __slots__ = ("path", "parser", "cache", "_steps", "_cached")
+
+    def __init__(_, parser, path, cache=False):
+        compiled = _compile_ref(path)
+        if compiled==None:
+            raise ValueError("malformed path <{}>".format(path))
+        _.path = path
+        _.parser = parser
+        _.cache = cache
+        _._steps = compiled[0]
+        _._cached = None # (generation, data, value, problem)
+
+    def resolve(_):
+        "(value, problem) at the path, problem being None or as for JCParser._resolve_ref"
+        parser = _.parser
+        if _.cache:
+            cached = _._cached
+            if cached!=None and cached[0]==parser.generation and cached[1] is parser.parsed_data:
+                return cached[2], cached[3]
+            generation = parser.generation # before the data, so a reload in between is a miss
+            root = parser.parsed_data
+            value, problem = _walk_ref(root, _._steps, root)
+            _._cached = (generation, root, value, problem)
+            return value, problem
+        root = parser.parsed_data
+        return _walk_ref(root, _._steps, root)
+
+    def get(_, default=None):
+        value, problem = _.resolve()
+        return default if problem else value
+
+    __call__ = get
+
+    def __repr__(_):
+        return "JCPath({!r})".format(_.path)
+
+class JCDiagnostic(namedtuple("JCDiagnostic", "severity code line column fmt args")):
+    '''
+    one error or warning. severity is "error" or "warning", code names the problem (eg
+    "indent", "key-type" or "ref-missing"), line and column (from 1) say where it is if it
+    is in the config and the message is fmt % args, only formatted when it is read
+    '''
+    __slots__ = ()
+
+    @property
+    def message(_):
+        return _.fmt % _.args if _.args else _.fmt
+
+    def __str__(_):
+        return _.message
+
+_LOG = logging.getLogger("JermConfig")
+
+class _ConsoleHandler(logging.Handler):
+    '''
+    print JermConfig's log records the way verbose parsers always have, for programs that
+    have not set up logging. once the root logger has handlers records are left to them
+    '''
+    def emit(_, record):
+        if logging.getLogger().handlers:
+            return
+        msg = record.getMessage()
+        if "win" in sys.platform.lower():
+            print ("[JERM-PARSER] {}".format(msg))
+        elif record.levelno>=logging.ERROR:
+            print ("\033[1;31m[JERM-PARSER]\033[0m {}".format(msg))
+        else:
+            print ("\033[1;33m[JERM-PARSER]\033[0m {}".format(msg))
+
+_LOG.addHandler(_ConsoleHandler())
+
+class JCStats(object):
+    '''
+    where one parse spent its time and what it went through. `phases` holds the seconds
+    spent reading the file ("io"), measuring indentation ("indent"), expanding environment
+    variables ("env"), substituting references ("refs"), converting values to their types
+    ("coerce"), the rest of the parse ("other") and all of it ("total"). lines of lazily
+    parsed sections (see JCParser's `lazy`) are only counted if they are parsed by parse()
+    '''
+    __slots__ = ("path", "status", "phases", "lines", "lines_processed", "lines_skipped",
+        "refs", "ref_time", "env_lookups", "dicts", "lists", "depth")
+
+    def __init__(_, path):
+        _.path = path
+        _.status = False
+        _.phases = dict.fromkeys(("io", "indent", "env", "refs", "coerce", "other", "total"), 0.0)
+        _.lines = 0           # lines parsed
+        _.lines_processed = 0 # ...that held a value or container
+        _.lines_skipped = 0   # ...that were blank, comments or magic indicators
+        _.refs = 0            # references resolved
+        _.ref_time = 0.0      # seconds spent resolving them
+        _.env_lookups = 0     # environment variables looked up
+        _.dicts = 0           # containers in the parsed data
+        _.lists = 0
+        _.depth = 0           # how deep they are nested
+
+    def as_dict(_):
+        "the stats as a plain dict, eg to send to a metrics pipeline"
+        stats = dict((name, getattr(_, name)) for name in _.__slots__)
+        stats["phases"] = dict(_.phases)
+        return stats
+
+    def __repr__(_):
+        return "JCStats({!r})".format(_.as_dict())
+
+    def _count_containers(_, data):
+        "count the containers in the parsed data and how deep they go, each container once"
+        seen, stack = set(), [(v, 1) for v in data.values()]
+        while stack:
+            value, depth = stack.pop()
+            if isinstance(value, dict):
+                children = value.values()
+                kind = "dicts"
+            elif isinstance(value, list) or _is_typed_array(value):
+                children = value if isinstance(value, list) else ()
+                kind = "lists"
+            else:
+                continue
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            setattr(_, kind, getattr(_, kind)+1)
+            _.depth = max(_.depth, depth)
+            stack.extend((child, depth+1) for child in children)
+
+_STATS_HOOKS = []
+
+def add_stats_hook(callback):
+    '''
+    call `callback` with the JCStats of every parse from now on, by any parser (which makes
+    every parse collect stats). exceptions it raises are logged and ignored
+    '''
+    _STATS_HOOKS.append(callback)
+
+def remove_stats_hook(callback):
+    "stop calling a callback given to add_stats_hook"
+    if callback in _STATS_HOOKS:
+        _STATS_HOOKS.remove(callback)
+
+# what JCParser._instrument shadows on a parser
+_INSTRUMENTED = ("_read_source", "_indent_level", "_expand_env", "_substitute_refs",
+    "_resolve_ref", "_fill_array", "_parse_lines", "_types")
+
+def _counted(lines, stats):
+    "pass lines through, counting them in stats.lines"
+    for line in lines:
+        stats.lines += 1
+        yield line
+
+# options a schema field can have, see compile_schema
+_FIELD_OPTIONS = ("type", "required", "default", "min", "max", "keys", "items")
+_NO_DEFAULT = object()
+_STRINGS = (str,) if PY_VERSION==3 else (str, unicode)
+
+class JCSchema(object):
+    '''
+    a schema compiled by compile_schema. `paths` maps the key path of each field that is not
+    inside a list to the field, `dicts` holds (path, field) of the dict fields reachable that
+    way, parents before children, and `key` tells schemas apart in cache keys
+    '''
+    __slots__ = ("spec", "paths", "dicts", "key")
+
+    def __init__(_, spec, root):
+        _.spec = spec
+        _.paths, _.dicts = {}, []
+        stack = [((), root)]
+        while stack:
+            path, field = stack.pop()
+            _.dicts.append((path, field))
+            for name in sorted(field.keys, reverse=True):
+                child = field.keys[name]
+                _.paths[path+(name,)] = child
+                if child.keys!=None:
+                    stack.append((path+(name,), child))
+        _.key = hashlib.sha1(repr(_canonical(spec)).encode("utf-8")).hexdigest()[:16]
+
+    def __repr__(_):
+        return "JCSchema({!r})".format(_.spec)
+
+class _SchemaField(object):
+    '''
+    a compiled schema field. check(value) returns (value, problem): the value converted to
+    the field's type and, if it does not fit the field, problem as (where, text) with where
+    the path below the field ("" for the value itself)
+    '''
+    __slots__ = ("type", "required", "default", "keys", "items", "check")
+
+def _canonical(spec):
+    "spec with its dicts turned into sorted item tuples, so equal specs have the same repr"
+    if isinstance(spec, dict):
+        return tuple(sorted((k, _canonical(v)) for k,v in spec.items()))
+    if isinstance(spec, (list, tuple)):
+        return tuple(_canonical(v) for v in spec)
+    return spec
+
+def compile_schema(spec):
+    '''
+    compile `spec`, a dict of the top-level keys of a config and their fields, into a JCSchema
+    for JCParser(schema=...). a field is a type or a dict of
+        type: i, f, s, b, {} or a list type ([], [i], [f], [s], [b]). any value if left out
+        required: the key must be in the config
+        default: value to fill in if the key is not in the config
+        min, max: bounds of numbers, or of the length of strings and lists
+        keys: the fields of a {} (as in spec)
+        items: the field of the items of a list. its type defaults to the list's
+    eg {"port": {"type": "i", "min": 1, "max": 65535, "default": 80}, "hosts": "[s]",
+        "db": {"type": "{}", "keys": {"user": {"type": "s", "required": True}}}}
+    raises ValueError if spec is not a valid schema
+    '''
+    return JCSchema(spec, _compile_field({"type": "{}", "keys": spec}, ""))
+
+def _compile_field(spec, where):
+    if not isinstance(spec, dict):
+        spec = {"type": spec}
+    for option in spec:
+        if option not in _FIELD_OPTIONS:
+            raise ValueError("schema field <{}> has unknown option <{}>".format(where, option))
+
+    field = _SchemaField()
+    t = field.type = spec.get("type")
+    if t!=None and t not in JCParser.types:
+        raise ValueError("schema field <{}> has unknown type <{}>".format(where, t))
+    field.required = bool(spec.get("required", False))
+
+    field.keys = field.items = None
+    if t=="{}":
+        keys = spec.get("keys", {})
+        if not isinstance(keys, dict):
+            raise ValueError("keys of schema field <{}> must be a dict".format(where))
+        field.keys = dict((name, _compile_field(keys[name], "{}/{}".format(where, name).lstrip("/")))
+            for name in keys)
+    elif "keys" in spec:
+        raise ValueError("schema field <{}> has keys but is not a {{}}".format(where))
+    if t in JCParser.list_types:
+        items = spec.get("items", {})
+        items = dict(items) if isinstance(items, dict) else {"type": items}
+        items.setdefault("type", t[1:-1] or None)
+        field.items = _compile_field(items, where+"[]")
+    elif "items" in spec:
+        raise ValueError("schema field <{}> has items but is not a list".format(where))
+
+    field.check = _field_check(field, spec.get("min"), spec.get("max"))
+    field.default = spec.get("default", _NO_DEFAULT)
+    if field.default is not _NO_DEFAULT:
+        value, problem = field.check(copy.deepcopy(field.default))
+        if problem!=None:
+            raise ValueError("default of schema field <{}> {}".format(where+problem[0], problem[1]))
+    return field
+
+def _field_check(field, lo, hi):
+    "the check function of a _SchemaField"
+    t = field.type
+    if t==None:
+        convert = None
+    elif t=="{}":
+        keys = field.keys
+        def convert(value):
+            if not isinstance(value, dict):
+                return value, ("", "must be a dict")
+            return value, _check_keys(value, keys, True)
+    elif field.items!=None:
+        convert = _list_check(field.items)
+    else:
+        convert = _converter(t)
+
+    def check(value):
+        if convert!=None:
+            value, problem = convert(value)
+            if problem!=None:
+                return value, problem
+        if lo!=None or hi!=None:
+            return value, _out_of_bounds(value, lo, hi)
+        return value, None
+    return check
+
+def _converter(t):
+    '''
+    function turning a value into a value of basic config type t. strings are parsed like
+    values declared as t and ints pass as floats, other values of the wrong type are problems
+    '''
+    problem = ("", "must be of type <{}>".format(t))
+    if t=="s":
+        def convert(value):
+            return value, (None if isinstance(value, _STRINGS) else problem)
+        return convert
+
+    parse = JCParser.types[t]
+    kind = bool if t=="b" else (numbers.Integral if t=="i" else numbers.Real)
+    def convert(value):
+        if isinstance(value, _STRINGS):
+            try:
+                return parse(value), None
+            except Exception:
+                return value, problem
+        if not isinstance(value, kind) or (t!="b" and isinstance(value, bool)):
+            return value, problem
+        return (float(value) if t=="f" else value), None
+    return convert
+
+def _list_check(items):
+    "function checking a list (or typed array) and its items against the field `items`"
+    def convert(value):
+        if isinstance(value, list):
+            for i in range(len(value)):
+                item, problem = items.check(value[i])
+                if problem!=None:
+                    return value, ("[{}]{}".format(i, problem[0]), problem[1])
+                value[i] = item
+        elif _is_typed_array(value):
+            if items.type not in (None, "f", _array_type(value)):
+                return value, ("", "must be a list of <{}>".format(items.type))
+            # the items already have their type, so this only checks bounds
+            for i, item in enumerate(value.tolist()):
+                problem = items.check(item)[1]
+                if problem!=None:
+                    return value, ("[{}]{}".format(i, problem[0]), problem[1])
+        else:
+            return value, ("", "must be a list")
+        return value, None
+    return convert
+
+def _out_of_bounds(value, lo, hi):
+    "the problem of a value outside [lo, hi], None if it is inside"
+    sized = isinstance(value, _STRINGS+(list, dict)) or _is_typed_array(value)
+    size = len(value) if sized else value
+    what = "length" if sized else "value"
+    try:
+        if lo!=None and size<lo:
+            return ("", "{} {} is below the minimum {}".format(what, size, lo))
+        if hi!=None and size>hi:
+            return ("", "{} {} is above the maximum {}".format(what, size, hi))
+    except TypeError:
+        return ("", "can't be compared with its bounds")
+    return None
+
+def _check_keys(obj, keys, deep):
+    '''
+    check dict obj against the fields `keys`, filling in defaults of missing keys and the
+    converted values of present ones. without `deep` only lists are checked, for values
+    that were checked as they were parsed. returns the first problem, else None
+    '''
+    for name in keys:
+        field = keys[name]
+        if name not in obj:
+            if field.default is not _NO_DEFAULT:
+                obj[name] = copy.deepcopy(field.default)
+            elif field.required:
+                return ("/"+name, "is missing")
+        elif deep or field.items!=None:
+            value, problem = field.check(obj[name])
+            if problem!=None:
+                return ("/"+name+problem[0], problem[1])
+            obj[name] = value
+    return None
+
+def _is_listlike(value):
+    "can value be written as a list: lists, tuples and other iterables that arent str/dict"
+    if isinstance(value, (list, tuple)):
+        return True
+    return hasattr(value, "__iter__") and not isinstance(value, (str, bytes, dict))
+
 def fdata(data):
     if sys.version_info[0]==3:
         return bytes(data, "utf-8")
     else: 
         return data
 
-class JCParser:
+class JCParser(object):
     # types supported when writing config files
     PyTypes = [type(0),type(0.0),type(()),type([]),type({}),type(""),type(False)]
     
@@ -268,10 +1843,14 @@ class JCParser:
         '{}':lambda x:x[:-2] # return variable name without the {}
     }
 
+    _types = types # what parsing converts with, see _instrument
+
     basic_types = sorted([k for k in types.keys() if len(k)==1])
     list_types = sorted([k for k in types.keys() if ("["in k)])
     
-    def __init__(_, fpath="", verbose=False, autoupdate=False, container=None):
+    def __init__(_, fpath="", verbose=False, autoupdate=False, container=None, disk_cache=None,
+        snapshot=False, debounce=0, content_hash=True, lazy=False, use_mmap=None,
+        typed_arrays=False, stats=False, env=None, schema=None):
         '''
         autoupdate: if True/1, the config file will be monitore for any updates
                     if the file is updated and the new config data is parsable
@@ -279,6 +1858,35 @@ class JCParser:
                     new parsed data
         container: an empty dictionary object that will contain the parsed data
                    this can be provided with or without the `autoupdate` flag
+        disk_cache: keep a compiled copy of each parsed file on disk and load that instead
+                    of parsing while the file and the environment variables it uses are
+                    unchanged. True stores it next to the config file, a directory path
+                    stores it in that directory
+        snapshot: publish each successful parse as a new read-only JCSnapshot in
+                  `snapshot` instead of only rebuilding `container` in place. with
+                  `autoupdate` this does not need a container
+        debounce: with `autoupdate`, wait until the file has not changed for this many
+                  seconds before reloading it so a burst of writes is reloaded once
+        content_hash: with `autoupdate`, skip reloads when the file was touched or rewritten
+                      but its bytes are the same as at the last reload
+        lazy: only index the top-level sections when parsing and parse each the first time
+              it is used. `parsed_data` is then a JCLazyData mapping. ignored with
+              `autoupdate`, `container` or `snapshot`, which need the whole config
+        use_mmap: memory-map the file and decode lines one at a time as they are parsed
+                  instead of reading it into a list of lines first. None does this for files
+                  of MMAP_THRESHOLD bytes or more. not used with `lazy` or `autoupdate`
+        typed_arrays: parse lists declared as [i] or [f] into numpy arrays (int64/float64) if
+                      numpy is installed, else array.arrays ('q'/'d'). "array" always uses
+                      array.arrays. a list whose items are not all of its declared type
+                      stays a list. items of a typed list cant be referenced before it ends
+        stats: keep a JCStats of each parse in `stats` (see JCStats). a callable is also called
+               with it after each parse, autoupdate reloads included. parses without stats
+               (or stats hooks, see add_stats_hook) are not instrumented at all
+        env: mapping $ENV_VARS are looked up in instead of os.environ. either is copied once
+             at the start of each parse, so a parse sees one consistent set of values
+        schema: a JCSchema or a spec for compile_schema. values are converted and checked as
+                they are parsed and defaults and required keys are filled in and checked
+                when the parse ends. a value that does not fit is an error
         '''
         # flag to show if parsing/writting was ok
         _.status = False
@@ -286,18 +1894,58 @@ class JCParser:
         # read this if status=True, error is empty string
         _.parsed_data = {}
         
-        # errors encountered when parsing
-        _.errors = ""
-
-        # warnings, if any (these can be present even if status is True)
-        _.warnings = ""
+        # errors and warnings (these can be present even if status is True) as JCDiagnostics.
+        # `errors` and `warnings` are the same as text
+        _.diagnostics = []
+        _._texts = {}
         
         _.verbose = verbose
+
+        # environment variables expanded by the last parse and their values (None if unset)
+        _.env_deps = {}
+        _.env = env
+        _._environ = {} # what the parse in progress looks them up in, see _parse_file
+
+        # files included by the last parse, directly or not, by real path, with their
+        # _file_identity when they were read
+        _.includes = {}
+        _._include_chain = () # files whose parse led to this one, see _include
+        _._including = ()     # ...and the file being parsed
+        _._include_dir = ""
+        _.disk_cache = disk_cache
         
         _.fpath = fpath
         _.autoupdate = autoupdate
         _.container = container
 
+        _.lazy = lazy
+        _.use_mmap = use_mmap
+        _.typed_arrays = typed_arrays
+        _.schema = schema if schema==None or isinstance(schema, JCSchema) else compile_schema(schema)
+
+        # JCStats of the last parse if stats are collected, see _parse_with_stats
+        _.collect_stats = stats
+        _.stats_hook = stats if callable(stats) else None
+        _.stats = None
+
+        # latest JCSnapshot of the parsed data if snapshot=True, None until a parse succeeds
+        _.use_snapshot = snapshot
+        _.snapshot = None
+
+        # number of successful parses published so far and what the last one published
+        _.generation = 0
+        _._published = None
+        _._subscribers = []
+        _._source_digest = None # _source_hash of the bytes parsed last, if sections are tracked
+
+        watching = (container!=None or snapshot) and autoupdate and fpath
+        identity = _file_identity(fpath) if watching else None
+
+        # top-level sections of the last parse, kept for autoupdated parsers so a reload only
+        # reparses the sections that changed (see _parse_sections)
+        _._track_sections = bool(watching)
+        _._sections = None
+
         if fpath:
             _.parse(fpath)
 
@@ -310,59 +1958,359 @@ class JCParser:
         #container = _.parsed_data
         #_.parsed_data = container
 
-        if (container!=None) and autoupdate and (fpath not in AUTO_UPDATING)\
-            and fpath and os.path.isfile(fpath):
-                
-            AUTO_UPDATING[fpath] = {'obj': _}
-            time.sleep(0.1) # give _autoupdate_jconfig to effect changes
+        if watching and os.path.isfile(fpath):
+            with _AUTO_UPDATING_LOCK:
+                # the identity is taken before parsing so an edit made while this parse
+                # was running is still picked up by the daemon
+                entry = {'obj': _, 'due': None,
+                    'identity': (identity, tuple(sorted(_.includes.items()))),
+                    'debounce': debounce, 'content_hash': content_hash, 'includes': {},
+                    # so touching the file without changing it doesnt reload it
+                    'hash': _content_hash(fpath, _.includes, _._source_digest)
+                        if content_hash else None}
+                AUTO_UPDATING.setdefault(fpath, []).append(entry)
+                _start_autoupdate()
+                _WATCHER.add(fpath)
+                _set_includes(entry, _.includes)
+                _WATCHER.wake()
+
+    def _watch_entry(_):
+        "this parser's entry in AUTO_UPDATING, None if it isnt watched. call with the lock held"
+        entries = [e for e in AUTO_UPDATING.get(_.fpath, ()) if e['obj'] is _]
+        return entries[0] if entries else None
+
+    @property
+    def watched(_):
+        "True while the autoupdate daemon watches this parser's file"
+        with _AUTO_UPDATING_LOCK:
+            return _._watch_entry()!=None
+
+    def unwatch(_):
+        '''
+        stop autoupdating this parser's file. the daemon shuts down once no file is watched.
+        returns True if the file was being watched
+        '''
+        with _AUTO_UPDATING_LOCK:
+            entry = _._watch_entry()
+            if entry==None:
+                return False
+            thread = _unwatch(_.fpath, entry)
+        _join(thread)
+        return True
+
+    def close(_):
+        "release what the parser holds outside itself, ie its autoupdate watch"
+        _.unwatch()
+
+    def __enter__(_):
+        return _
+
+    def __exit__(_, *exc_info):
+        _.close()
 
     def _reset(_):
         _.status = False
-        _.errors = ""
-        _.warnings = ""
+        _.diagnostics = []
+
+    @property
+    def errors(_):
+        "errors encountered when parsing, a line each"
+        return _._text("error")
+
+    @errors.setter
+    def errors(_, text):
+        _._set_text("error", text)
+
+    @property
+    def warnings(_):
+        "warnings of the last parse or write, a line each"
+        return _._text("warning")
+
+    @warnings.setter
+    def warnings(_, text):
+        _._set_text("warning", text)
+
+    def _text(_, severity):
+        "the messages of the diagnostics of a severity, formatted once until more are added"
+        cached = _._texts.get(severity)
+        if cached and cached[0] is _.diagnostics and cached[1]==len(_.diagnostics):
+            return cached[2]
+        text = "".join(d.message+"\n" for d in _.diagnostics if d.severity==severity)
+        _._texts[severity] = (_.diagnostics, len(_.diagnostics), text)
+        return text
+
+    def _set_text(_, severity, text):
+        "replace the diagnostics of a severity with `text`, for code that assigns the strings"
+        _.diagnostics = [d for d in _.diagnostics if d.severity!=severity]
+        if text:
+            _.diagnostics.append(JCDiagnostic(severity, "text", None, None, "%s", (text.rstrip("\n"),)))
+
+    def _report(_, verbose, severity, code, line, column, fmt, *args):
+        '''
+        record a JCDiagnostic. its message (fmt % args) is only formatted if it is logged here
+        (when `verbose`) or read
+        '''
+        _.diagnostics.append(JCDiagnostic(severity, code, line, column, fmt, args))
+        if verbose:
+            _.log(fmt, *args, level=logging.ERROR if severity=="error" else logging.WARNING)
 
     def parse(_, fpath):
         "attempt to parse a jerm-config-file"
-        
+        if _.collect_stats or _STATS_HOOKS:
+            return _._parse_with_stats(fpath)
+        return _._parse_file(fpath)
+
+    def _parse_with_stats(_, fpath):
+        "parse() with the parser instrumented (see _instrument), keeping a JCStats of it"
+        stats = JCStats(fpath)
+        _._instrument(stats)
+        started = _timer()
+        try:
+            _._parse_file(fpath)
+        finally:
+            # drop the instance's timed versions so the class' own are used again
+            for name in _INSTRUMENTED:
+                _.__dict__.pop(name, None)
+
+        phases = stats.phases
+        phases["total"] = _timer()-started
+        phases["other"] = max(0.0, phases["total"]-sum(
+            phases[p] for p in ("io", "indent", "env", "refs", "coerce")))
+        stats.lines_skipped = stats.lines-stats.lines_processed
+        stats.status = _.status
+        if _.status and isinstance(_.parsed_data, dict):
+            stats._count_containers(_.parsed_data)
+        _.stats = stats
+
+        for hook in ([_.stats_hook] if _.stats_hook else [])+_STATS_HOOKS:
+            try:
+                hook(stats)
+            except Exception as e:
+                _.log("stats hook {} raised {!r}".format(hook, e))
+
+    def _instrument(_, stats):
+        '''
+        shadow the methods (and type converters) a parse goes through with versions that time
+        them into `stats`. they are set on the instance only, so other parsers and parses
+        without stats run the plain methods with no overhead
+        '''
+        phases = stats.phases
+
+        def timed(func, phase):
+            def timed_func(*args, **kwargs):
+                started = _timer()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    phases[phase] += _timer()-started
+            return timed_func
+
+        indent_level = _._indent_level
+        def count_indent(line):
+            stats.lines_processed += 1
+            return indent_level(line)
+
+        expand_env = timed(_._expand_env, "env")
+        def count_env(text, env_vars, st):
+            stats.env_lookups += len(env_vars)
+            return expand_env(text, env_vars, st)
+
+        resolve_ref = _._resolve_ref
+        def count_ref(ref, st=None):
+            started = _timer()
+            try:
+                return resolve_ref(ref, st)
+            finally:
+                stats.refs += 1
+                stats.ref_time += _timer()-started
+
+        parse_lines = _._parse_lines
+        def count_lines(data, start, st):
+            if hasattr(data, "__len__"):
+                stats.lines += len(data)
+            else:
+                data = _counted(data, stats)
+            return parse_lines(data, start, st)
+
+        _._read_source = timed(_._read_source, "io")
+        _._indent_level = timed(count_indent, "indent")
+        _._expand_env = count_env
+        _._substitute_refs = timed(_._substitute_refs, "refs")
+        _._resolve_ref = count_ref
+        _._fill_array = timed(_._fill_array, "coerce")
+        _._parse_lines = count_lines
+        _._types = dict((t, timed(convert, "coerce")) for t,convert in JCParser.types.items())
+
+    def _parse_file(_, fpath):
         # initialize default magic-indicators....
         _.__strictindent__ = True # strict-indent = True
         _.__strictsyntax__ = True # strict-syntax = True
         #_.__verbose__     = True # verbose = True, set to False if __quiet__ is found in config file
         _.__verbose__      = _.verbose
 
-        try:
-            fin = open(fpath)
-        except:
-            _.errors = "could not open config file: <{}>".format(fpath)
-            if _.verbose:
-                _.log("could not open config file: <{}>".format(fpath))
+        # one copy of the environment per parse, which caches validate their env_deps against
+        _._environ = dict(os.environ if _.env==None else _.env)
+        _._including = _._include_chain+(os.path.realpath(fpath),)
+        _._include_dir = os.path.dirname(os.path.abspath(fpath))
+
+        cache_key = _file_identity(fpath) if _PARSE_CACHE.enabled else None
+        if cache_key!=None:
+            # parses with and without typed arrays or a schema differ
+            cache_key += (_._array_kind(), _.schema.key if _.schema!=None else None)
+            hit = _PARSE_CACHE.get(cache_key, _._environ)
+            if hit!=None:
+                _._reset()
+                _.parsed_data, _.diagnostics, _.env_deps, _.includes = hit
+                _._publish()
+                _.status = True
+                return
+
+        _._source_digest = None
+        source = _._read_source(fpath)
+        if source==None:
             return
+        raw, data, mm = source
+        if _._track_sections and mm==None:
+            _._source_digest = _source_hash(raw)
 
-        data = fin.readlines(); fin.close()
-        
-        fin.close()
+        if mm==None:
+            return _._parse_source(fpath, raw, data, cache_key)
+
+        try:
+            return _._parse_source(fpath, raw, data, cache_key)
+        except UnicodeDecodeError:
+            _.parsed_data = {}
+            _._report(_.verbose, "error", "decode", None, None, "could not decode config file: <%s>", fpath)
+        finally:
+            data.close() # releases its view of the map
+            mm.close()
+
+    def _read_source(_, fpath):
+        '''
+        (bytes, lines, map) of fpath. big files are mapped rather than read (see _mmap_lines)
+        and then bytes is the map too, else map is None. None if fpath cant be read
+        '''
+        mm = None
+        try:
+            with open(fpath, "rb") as fin:
+                size = os.fstat(fin.fileno()).st_size
+                if size and (_.use_mmap or (_.use_mmap==None and size>=MMAP_THRESHOLD)) and \
+                    not (_.lazy or _._track_sections):
+                    mm = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+                    raw, data = mm, _mmap_lines(mm, size)
+                else:
+                    raw = fin.read()
+                    # universal newlines, like reading the file in text mode
+                    data = io.StringIO(raw.decode("utf-8"), newline=None).readlines() \
+                        if PY_VERSION==3 else io.BytesIO(raw).readlines()
+        except (IOError, OSError):
+            _.diagnostics = [d for d in _.diagnostics if d.severity!="error"]
+            _._report(_.verbose, "error", "open", None, None, "could not open config file: <%s>", fpath)
+            return None
+        except UnicodeDecodeError:
+            _.diagnostics = [d for d in _.diagnostics if d.severity!="error"]
+            _._report(_.verbose, "error", "decode", None, None, "could not decode config file: <%s>", fpath)
+            return None
+        return raw, data, mm
+
+    def _parse_source(_, fpath, raw, data, cache_key):
+        '''
+        parse the contents of fpath: `raw` is its bytes (or a map of them) and data its lines.
+        cache_key is its key in the parse cache, if that is enabled
+        '''
+        cache_path = src_hash = None
+        arrays = _._array_kind()
+        if _.disk_cache and data:
+            cache_path, src_hash = _disk_cache_path(fpath, _.disk_cache), _source_hash(raw)
+            if arrays:
+                src_hash += "/"+arrays # parses with and without typed arrays differ
+            if _.schema!=None:
+                src_hash += "/schema:"+_.schema.key
+            hit = _load_disk_cache(cache_path, src_hash, _._environ)
+            if hit!=None:
+                _._reset()
+                _.parsed_data, _.diagnostics, _.env_deps, _.includes = hit
+                if cache_key!=None:
+                    _PARSE_CACHE.put(cache_key, _.parsed_data, _.diagnostics, _.env_deps, _.includes)
+                _._publish()
+                _.status = True
+                return
 
         if not data:
-            _.errors = "config file is empty"
-            if _.verbose:
-                _.log("config file is empty")
-            return 
+            _.diagnostics = [d for d in _.diagnostics if d.severity!="error"]
+            _._report(_.verbose, "error", "empty", None, None, "config file is empty")
+            return
         
         # reset old parsed data
         _._reset()
         _.parsed_data = {}
+        _.env_deps = {}
+        _.includes = {}
+
+        if _.lazy and _.container==None and _.schema==None and not (_.use_snapshot or _._track_sections):
+            layout = _lazy_index(data)
+            if layout!=None:
+                preamble_end, sections, first_indented = layout
+                # the preamble only holds comments and magic indicators
+                _._parse_lines(data[:preamble_end], 0, _ParseState({}))
+                indent_unit = 0 if first_indented==None else _._indent_level(data[first_indented])
+                _.parsed_data = JCLazyData(_, data, sections, first_indented, indent_unit,
+                    (_.__strictindent__, _.__strictsyntax__, _.__verbose__))
+                _.status = True
+                return
+
+        st = _ParseState(_.parsed_data)
+        if _._track_sections:
+            previous, _._sections = _._sections, None
+            if not _._parse_sections(data, st, previous):
+                return
+        elif not _._parse_lines(data, 0, st):
+            return
+        if _.schema!=None and not _._finish_schema():
+            return
+
+        if cache_key!=None:
+            _PARSE_CACHE.put(cache_key, _.parsed_data, _.diagnostics, _.env_deps, _.includes)
+        if cache_path!=None:
+            _save_disk_cache(cache_path, src_hash, _.env_deps, _.includes, _.diagnostics,
+                _pack_arrays(_.parsed_data) if arrays else _.parsed_data)
 
-        indents = {-1: _.parsed_data} # indent: object; parent object is the max of the lower indents!
-        default_type = "s"
+        _._publish()
+        _.status = True
 
-        line_count = 0
-        index = 0
+    def _parse_lines(_, data, start, st):
+        '''
+        parse `data`, the lines of the file from line index `start` on, into the containers
+        in st (a _ParseState), picking up where the lines before them left it. returns False
+        if parsing has to stop (errors under strict syntax)
+        '''
+        # scope stack of open containers, outermost first. each scope is [indent, container, path]
+        # and the parent of a line is the innermost scope indented less than the line. scopes
+        # are popped on dedent so the stack never grows past the current nesting depth
+        # scopes also carry the key path of dict containers (None once inside a list) so every
+        # definition can be recorded in st.index, which maps key paths to their values
+        scopes = st.scopes
+        st.reported = len(_.diagnostics)
+        default_type = t = st.default_type
+        arrays = _._array_kind()
+        types = _._types # JCParser.types, unless stats are being collected
+        schema = _.schema.paths if _.schema!=None else None
+
+        line_count = start
         
-        indent_unit = 0
+        indent_unit = st.indent_unit
 
         for line in data:
             line_count += 1
-            if not(line.strip()and line.strip()[0]!="#"and not _._update_indicator(line.strip())):
+            stripped = line.strip()
+            if not stripped or stripped[0]=="#":
+                continue
+            if stripped in _MAGIC_WORDS:
+                # the typed lists waiting for their arrays are judged under the indicators in
+                # force when their items were read
+                if st.pending and not _._flush_arrays(st):
+                    return False
+                _._update_indicator(stripped)
                 continue
     
             line = line.rstrip()
@@ -375,301 +2323,174 @@ class JCParser:
 
             # check for indentation error...
             if _.__strictindent__ and indent_unit and indent%indent_unit:
-                _.errors += "indentation error(line {})\n".format(line_count)
-                if _.__verbose__:
-                    _.log("indentation error(line {})".format(line_count))
+                _._line_error(st, "indent", line_count, indent+1, "indentation error(line %s)", line_count)
                 if _.__strictsyntax__:
                     _.parsed_data = {}
-                    return
+                    return False
                 else: continue
                                 
-            _indents = [k for k in indents]; _indents.sort()
-            if indent<_indents[-1] and (indent not in _indents):
-                _.errors += "indentation error(line {})\n".format(line_count)
-                if _.__verbose__:
-                    _.log("indentation error(line {})".format(line_count))
+            # find the innermost scope that is not indented deeper than this line. a dedent
+            # must land exactly on the indent of an open scope
+            depth = len(scopes)-1
+            while scopes[depth][0]>indent:
+                depth -= 1
+            if depth<len(scopes)-1 and scopes[depth][0]!=indent:
+                _._line_error(st, "indent", line_count, indent+1, "indentation error(line %s)", line_count)
                 if _.__strictsyntax__:
                     _.parsed_data = {}
-                    return
+                    return False
                 else: continue
-            
-            parent = indents[[i for i in _indents if i<indent][-1]]
+
+            # scopes this line dedents out of (including a sibling at the same indent) are only
+            # closed once the line is accepted; a line rejected under __nonstrictsyntax__ is
+            # treated as a comment and must leave the open scopes as they were
+            if scopes[depth][0]==indent:
+                depth -= 1
+
+            parent, path = scopes[depth][1], scopes[depth][2]
 
             line = line.strip()
 
+            if line[0]=="_" and line.startswith(_INCLUDE) and line[len(_INCLUDE):len(_INCLUDE)+1] in ("", " ", "\t"):
+                if not _._include(line[len(_INCLUDE):].strip(), parent, path, st, line_count, indent):
+                    if _.__strictsyntax__:
+                        _.parsed_data = {}
+                        return False
+                    else: continue
+                del scopes[depth+1:]
+                continue
+
             if "=" in line:
                 if isinstance(parent, list):
-                    _.errors += "value error, key-value pair in list(line {})\n".format(line_count)
-                    if _.__verbose__:
-                        _.log("value error, key-value pair in list(line {})".format(line_count))
+                    _._line_error(st, "pair-in-list", line_count, indent+1, "value error, key-value pair in list(line %s)", line_count)
                     if _.__strictsyntax__:
                         _.parsed_data = {}
-                        return
+                        return False
                     else: continue
 
                 key,value = line[:line.index("=")].strip(), line[line.index("=")+1:].strip()
                 
-                # environment variables -------------------------------
-                _env_vars = []
-                _copy_vars = [] # variables that are references of others already parsed
-                prev_pos, prev_copy_pos = 0, 0
-                _scanning, _copy_scanning = 0, 0
-                value += ' ' # prevent a rare bug where $ENVVAR was the last on the line
-                for _pos, c in enumerate(value):
-                    if '$'==c:
-                        if _pos and (value[_pos-1] in ['\\']):
-                            _scanning = 0
-                            continue
-                            
-                        _scanning = 1
-                        prev_pos  = _pos
-                        continue
+                # environment variables and references ---------------
+                _env_vars, _copy_vars = _scan_tokens(value)
+                if _copy_vars and st.pending and not _._flush_arrays(st, depth):
+                    return False
 
-                    if _scanning and (c.lower() not in 'abcdefghijklmnopqrstuvwxyz_0123456789'):
-                        _env_vars.append(value[prev_pos+1:_pos])
-                        _scanning = 0
+                if _env_vars:
+                    value = _._expand_env(value, _env_vars, st)
 
-                    if '`'==c:
-                        if _pos and (value[_pos-1] in ['\\']):
-                            #if _copy_scanning = 0
-                            continue
-                            
-                        if not _copy_scanning:
-                            _copy_scanning = 1
-                            prev_copy_pos  = _pos
-                            continue
-
-                        _copy_vars.append(value[prev_copy_pos+1:_pos])
-                        _copy_scanning = 0
-
-                for _env_var in _env_vars:
-                    _ev = os.getenv(_env_var)
-                    if not _ev: continue
-                    value = value.replace('$'+_env_var, _ev)
-
-                for _cv in _copy_vars:
-                    if not _cv: continue
-                    _parts = [i.strip() for i in _cv.split('/')] # we can have paths
-                    _pd = _.parsed_data
-                    for _pi,_part in enumerate(_parts):
-                        _cpy = None
-                        try:
-                            if '[' in _part:
-                                _cpy = eval("_pd.get(\"{}\",None)".format(_part[:_part.index('[')]));
-                                    
-                                if type(_cpy)!=type([]):
-                                    _.warnings += "reference error, indexing non-list reference `{}` (line {})\n".format(_cv,line_count)
-                                    if _.__verbose__:
-                                        _.log("reference error, indexing non-list reference `{}` (line {})\n".format(_cv,line_count))
-                                    break
-                                try:
-                                    _cpy = eval("_cpy{}".format(_part[_part.index('['):]))
-                                except:
-                                    _.warnings += "reference error, index out of range for list reference `{}` (line {})\n".format(_cv,line_count)
-                                    if _.__verbose__:
-                                        _.log("reference error, index out of range for list reference `{}` (line {})\n".format(_cv,line_count))
-                                    break
-                                    
-                            else:
-                                _cpy = eval("_pd.get(\"{}\",None)".format(_part));
-                        except:
-                            _.warnings += "reference error, could not find reference `{}` (line {})\n".format(_cv,line_count)
-                            if _.__verbose__:
-                                _.log("reference error, could not find reference `{}` (line {})\n".format(_cv,line_count))
-                            break
+                value = _._substitute_refs(value, _copy_vars, line_count, st)
 
-                        if None!=_cpy:
-                            if type(_cpy) not in [type(""),type(0),type(0.0)]:
-                                # _cpy is an object, not just a constant
-                                if _pi==(len(_parts)-1):
-                                    if ("`"+_cv+"`").strip()==value.strip():
-                                        value = _cpy
-                                    else:
-                                        value = value.replace('`'+_cv+'`', str(_cpy))
-                                else:
-                                    _pd = _cpy
-                            else:
-                                value = value.replace('`'+_cv+'`', str(_cpy))
-
-                value = value[:-1]
                 # -----------------------------------------------------
                                         
 
                 if ("{" in key)or("}" in key)or("[" in key)or("]" in key):
-                    _.errors += "syntax error, key contains container characters(line {})\n".format(line_count)
-                    if _.__verbose__:
-                        _.log("syntax error, key contains container characters(line {})".format(line_count))
+                    _._line_error(st, "key-chars", line_count, indent+1, "syntax error, key contains container characters(line %s)", line_count)
                     if _.__strictsyntax__:
                         _.parsed_data = {}
-                        return
+                        return False
                     else: continue
 
                 if ":" in key:
                     if len(key)<3 or key[-2]!=":":
-                        _.errors += "key error(line {}); key is malformed! expected it to be in format key:TYPE eg age:i or pi:f\n".format(line_count)
-                        if _.__verbose__:
-                            _.log("key error(line {}); key is malformed! expected it to be in format key:TYPE eg age:i or pi:f".format(line_count))
+                        _._line_error(st, "key-format", line_count, indent+1, "key error(line %s); key is malformed! expected it to be in format key:TYPE eg age:i or pi:f", line_count)
                         if _.__strictsyntax__:
                             _.parsed_data = {}
-                            return
+                            return False
                         else: continue
                     
                     key,t = key[:-2].strip(), key[-1]
                     
                     if t not in JCParser.types:
-                        _.errors += "type error(line {}); key has unknown type <{}>. supported types are {}\n".format(line_count, t, JCParser.basic_types)
-                        if _.__verbose__:
-                            _.log("type error(line {}); key has unknown type <{}>. supported types are {}".format(line_count, t, JCParser.basic_types))
+                        _._line_error(st, "key-type", line_count, indent+1, "type error(line %s); key has unknown type <%s>. supported types are %s", line_count, t, JCParser.basic_types)
                         if _.__strictsyntax__:
                             _.parsed_data = {}
-                            return
+                            return False
                         else: continue
                     
                     try:
-                        value = JCParser.types[t](value)
+                        value = types[t](value)
                     except:
-                        _.errors += "type error(line {}); key defined value as of type <{}> but value can't be parsed to this type\n".format(line_count, t)
-                        if _.__verbose__:
-                            _.log("type error(line {}); key defined value as of type <{}> but value can't be parsed to this type".format(line_count, t))
+                        _._line_error(st, "key-value", line_count, indent+1, "type error(line %s); key defined value as of type <%s> but value can't be parsed to this type", line_count, t)
+                        if _.__strictsyntax__:
+                            _.parsed_data = {}
+                            return False
+                        else: continue
+
+                if schema!=None and path!=None and path+(key,) in schema:
+                    value, problem = schema[path+(key,)].check(value)
+                    if problem!=None:
+                        _._line_error(st, "schema", line_count, indent+1, "schema error(line %s); <%s> %s", line_count, "/".join(path+(key,))+problem[0], problem[1])
                         if _.__strictsyntax__:
                             _.parsed_data = {}
-                            return
+                            return False
                         else: continue
 
+                del scopes[depth+1:]
                 parent[key] = value
+                if path!=None:
+                    st.define(path+(key,), value)
 
             else:
                 obj = None
 
-                # environment variables -------------------------------
-                _env_vars = []
-                _copy_vars = [] # variables that are references of others already parsed
-                prev_pos, prev_copy_pos = 0, 0
-                _scanning, _copy_scanning = 0, 0
-                line += ' ' # prevent a rare bug where $ENVVAR was the last on the line
-
-                for _pos, c in enumerate(line):
-                    if '$'==c:
-                        if _pos and (line[_pos-1] in ['\\']):
-                            _scanning = 0
-                            continue
-                            
-                        _scanning = 1
-                        prev_pos  = _pos
-                        continue
+                # environment variables and references ---------------
+                _env_vars, _copy_vars = _scan_tokens(line)
+                if _copy_vars and st.pending and not _._flush_arrays(st, depth):
+                    return False
 
-                    if _scanning and (c.lower() not in 'abcdefghijklmnopqrstuvwxyz_0123456789'):
-                        _env_vars.append(line[prev_pos+1:_pos])
-                        _scanning = 0
+                if _env_vars:
+                    line = _._expand_env(line, _env_vars, st)
 
-                    if '`'==c:
-                        if _pos and (line[_pos-1] in ['\\']):
-                            #if _copy_scanning = 0
-                            continue
-                            
-                        if not _copy_scanning:
-                            _copy_scanning = 1
-                            prev_copy_pos  = _pos
-                            continue
-
-                        _copy_vars.append(line[prev_copy_pos+1:_pos])
-                        _copy_scanning = 0
-
-                for _env_var in _env_vars:
-                    _ev = os.getenv(_env_var)
-                    if not _ev: continue
-                    line = line.replace('$'+_env_var, _ev)
-
-                for _cv in _copy_vars:
-                    if not _cv: continue
-                    _parts = [i.strip() for i in _cv.split('/')] # we can have paths
-                    _pd = _.parsed_data
-                    for _pi,_part in enumerate(_parts):
-                        _cpy = None
-                        try:
-                            if '[' in _part:
-                                _cpy = eval("_pd.get(\"{}\",None)".format(_part[:_part.index('[')]));
-
-                                if type(_cpy)!=type([]):
-                                    _.warnings += "reference error, indexing non-list reference `{}` (line {})\n".format(_cv,line_count)
-                                    if _.__verbose__:
-                                        _.log("reference error, indexing non-list reference `{}` (line {})\n".format(_cv,line_count))
-                                    break
-                                try:
-                                    _cpy = eval("_cpy{}".format(_part[_part.index('['):]))
-                                except:
-                                    _.warnings += "reference error, index out of range for list reference `{}` (line {})\n".format(_cv,line_count)
-                                    if _.__verbose__:
-                                        _.log("reference error, index out of range for list reference `{}` (line {})\n".format(_cv,line_count))
-                                    break
-                                    
-                            else:
-                                _cpy = eval("_pd.get(\"{}\",None)".format(_part));
-                        except:
-                            _.warnings += "reference error, could not find reference `{}` (line {})\n".format(_cv,line_count)
-                            if _.__verbose__:
-                                _.log("reference error, could not find reference `{}` (line {})\n".format(_cv,line_count))
-                            break
+                line = _._substitute_refs(line, _copy_vars, line_count, st, whole=False)
 
-                        if None!=_cpy:
-                            if type(_cpy) not in [type(""),type(0),type(0.0)]:
-                                # _cpy is an object, not just a constant
-                                if _pi==(len(_parts)-1):
-                                    if ("`"+_cv+"`").strip()==line.strip():
-                                        line = _cpy
-                                    else:
-                                        line = line.replace('`'+_cv+'`', str(_cpy))
-                                else:
-                                    _pd = _cpy
-                            else:
-                                line = line.replace('`'+_cv+'`', str(_cpy))
-
-                line = line[:-1]
                 # -----------------------------------------------------
 
                 if ("{" in line)or("}" in line):
                     if (not line.endswith("{}"))or (line.count("{")!=1 or line.count("}")!=1):
-                        _.errors += "syntax error(line {}); dict containers are defined in format var{}\n".format(line_count,'{}')
-                        if _.__verbose__:
-                            _.log("syntax error(line {}); dict containers are defined in format var{}".format(line_count,'{}'))
+                        _._line_error(st, "dict-format", line_count, indent+1, "syntax error(line %s); dict containers are defined in format var{}", line_count)
                         if _.__strictsyntax__:
                             _.parsed_data = {}
-                            return
+                            return False
                         else: continue
 
                     line = JCParser.types["{}"](line)
 
                     if isinstance(parent, list):
+                        if st.pending and id(parent) in st.pending and not _._fill_list(st, parent):
+                            return False
                         parent.append({})
-                        obj = parent[-1]
+                        obj, obj_path = parent[-1], None
                         
                         if line:
-                            _.warnings += "warning (line {}); dict name <{}> will be abandoned since parent is a list\n".format(line_count, line)
-                            if _.__verbose__:
-                                _.log("warning (line {}); dict name <{}> will be abandoned since parent is a list".format(line_count, line))
+                            _._report(_.__verbose__, "warning", "dict-name-dropped", line_count, indent+1, "warning (line %s); dict name <%s> will be abandoned since parent is a list", line_count, line)
                     else:
                         if not line:
-                            _.errors += "name error(line {}); this dict must have a name as its a direct child of another dict\n".format(line_count)
-                            if _.__verbose__:
-                                _.log("name error(line {}); this dict must have a name as its a direct child of another dict".format(line_count))
+                            _._line_error(st, "dict-name", line_count, indent+1, "name error(line %s); this dict must have a name as its a direct child of another dict", line_count)
                             if _.__strictsyntax__:
                                 _.parsed_data = {}
-                                return
+                                return False
+                            else: continue
+
+                        if schema!=None and path!=None and not _._schema_container(st, schema, path+(line,), "{}", line_count, indent):
+                            if _.__strictsyntax__:
+                                _.parsed_data = {}
+                                return False
                             else: continue
 
                         parent[line] = {}
-                        obj = parent[line]
+                        obj, obj_path = parent[line], (None if path==None else path+(line,))
+                        if obj_path!=None:
+                            st.define(obj_path, obj)
 
-                    indents[indent] = obj
+                    del scopes[depth+1:]
+                    scopes.append([indent, obj, obj_path])
                     
                 elif ("[" in line)or("]" in line):
                     if line.count("[")!=1 or line.count("]")!=1 or line.index('[')>line.index('['):
-                        _.errors += "syntax error(line {}); list containers are defined in format var[TYPE]\n".format(line_count)
-                        if _.__verbose__:
-                            _.log("syntax error(line {}); list containers are defined in format var[TYPE]".format(line_count))
+                        _._line_error(st, "list-format", line_count, indent+1, "syntax error(line %s); list containers are defined in format var[TYPE]", line_count)
                         if _.__strictsyntax__:
                             _.parsed_data = {}
-                            return
+                            return False
                         else: continue
                                        
                     list_type_known = False
@@ -681,21 +2502,17 @@ class JCParser:
                     t = line[line.index("[")+1:line.index("]")]
                     t = t if t else "s"
                     if t not in JCParser.basic_types:
-                        _.errors += "type error(line {}); list container sets default unknown type <{}>. supported types are {}\n".format(line_count, t, JCParser.basic_types)
-                        if _.__verbose__:
-                            _.log("type error(line {}); list container sets default unknown type <{}>. supported types are {}".format(line_count, t, JCParser.basic_types))
+                        _._line_error(st, "list-type", line_count, indent+1, "type error(line %s); list container sets default unknown type <%s>. supported types are %s", line_count, t, JCParser.basic_types)
                         if _.__strictsyntax__:
                             _.parsed_data = {}
-                            return
+                            return False
                         else: continue
                             
                     if not list_type_known:
-                        _.errors += "syntax error(line {}); list containers are defined in format var[TYPE]\n".format(line_count)
-                        if _.__verbose__:
-                            _.log("syntax error(line {}); list containers are defined in format var[TYPE]".format(line_count))
+                        _._line_error(st, "list-format", line_count, indent+1, "syntax error(line %s); list containers are defined in format var[TYPE]", line_count)
                         if _.__strictsyntax__:
                             _.parsed_data = {}
-                            return
+                            return False
                         else: continue
                     
                     default_type = t
@@ -703,97 +2520,528 @@ class JCParser:
                     line = line[:line.index("[")].strip()
 
                     if isinstance(parent, list):
+                        if st.pending and id(parent) in st.pending and not _._fill_list(st, parent):
+                            return False
                         parent.append([])
-                        obj = parent[-1]
+                        obj, obj_path = parent[-1], None
                         
                         if line:
-                            _.warnings += "warning (line {}); list name <{}> will be abandoned since parent is a list\n".format(line_count, line)
-                            if _.__verbose__:
-                                _.log("warning (line {}); list name <{}> will be abandoned since parent is a list".format(line_count, line))
+                            _._report(_.__verbose__, "warning", "list-name-dropped", line_count, indent+1, "warning (line %s); list name <%s> will be abandoned since parent is a list", line_count, line)
                     else:
                         if not line:
-                            _.errors += "name error(line {}); this list must have a name as its a direct child of another dict\n".format(line_count)
-                            if _.__verbose__:
-                                _.log("name error(line {}); this list must have a name as its a direct child of another dict".format(line_count))
+                            _._line_error(st, "list-name", line_count, indent+1, "name error(line %s); this list must have a name as its a direct child of another dict", line_count)
                             if _.__strictsyntax__:
                                 _.parsed_data = {}
-                                return
+                                return False
+                            else: continue
+
+                        if schema!=None and path!=None and not _._schema_container(st, schema, path+(line,), "[]", line_count, indent):
+                            if _.__strictsyntax__:
+                                _.parsed_data = {}
+                                return False
                             else: continue
 
                         parent[line] = []
-                        obj = parent[line]
+                        obj, obj_path = parent[line], (None if path==None else path+(line,))
+                        if obj_path!=None:
+                            st.define(obj_path, obj)
+
+                    if arrays and t in _ARRAY_TYPECODES:
+                        # its items are collected and converted together, see _fill_array
+                        st.pending[id(obj)] = [obj, parent,
+                            len(parent)-1 if isinstance(parent, list) else line, obj_path, t, [], obj, None]
 
-                    indents[indent] = obj
+                    del scopes[depth+1:]
+                    scopes.append([indent, obj, obj_path])
                     
                 elif ":" in line:
                     if isinstance(parent, dict):
-                        _.errors += "syntax error(line {}); dict container cannot have a type\n".format(line_count)
-                        if _.__verbose__:
-                            _.log("syntax error(line {}); dict container cannot have a type".format(line_count))
+                        _._line_error(st, "dict-type", line_count, indent+1, "syntax error(line %s); dict container cannot have a type", line_count)
                         if _.__strictsyntax__:
                             _.parsed_data = {}
-                            return
+                            return False
                         else: continue
                     else:
                         # this is a list item
                         if line.count(":")!=1 or len(line)<3 or line[-2]!=":":
-                            _.errors += "syntax error(line {}); section is malformed! expected it to be in format section:TYPE eg age:i or pi:f\n".format(line_count)
-                            if _.__verbose__:
-                                _.log("syntax error(line {}); section is malformed! expected it to be in format section:TYPE eg age:i or pi:f".format(line_count))
+                            _._line_error(st, "item-format", line_count, indent+1, "syntax error(line %s); section is malformed! expected it to be in format section:TYPE eg age:i or pi:f", line_count)
                             if _.__strictsyntax__:
                                 _.parsed_data = {}
-                                return
+                                return False
                             else: continue
                         
                         line,t = line[:-2].strip(), line[-1]
                         
                         if t not in JCParser.basic_types:
-                            _.errors += "type error(line {}); section has unknown type <{}>. supported types are {}\n".format(line_count, t, JCParser.basic_types)
-                            if _.__verbose__:
-                                _.log("type error(line {}); section has unknown type <{}>. supported types are {}".format(line_count, t, JCParser.basic_types))
+                            _._line_error(st, "item-type", line_count, indent+1, "type error(line %s); section has unknown type <%s>. supported types are %s", line_count, t, JCParser.basic_types)
                             if _.__strictsyntax__:
                                 _.parsed_data = {}
-                                return
+                                return False
                             else: continue
                         
                         try:
-                            line = JCParser.types[t](line)
+                            line = types[t](line)
                         except:
-                            _.errors += "type error(line {}); section declared with type <{}> but can't be parsed to this type\n".format(line_count, t)
-                            if _.__verbose__:
-                                _.log("type error(line {}); section declared with type <{}> but can't be parsed to this type".format(line_count, t))
+                            _._line_error(st, "item-value", line_count, indent+1, "type error(line %s); section declared with type <%s> but can't be parsed to this type", line_count, t)
                             if _.__strictsyntax__:
                                 _.parsed_data = {}
-                                return
+                                return False
                             else: continue
                         
+                        if st.pending and id(parent) in st.pending and not _._fill_list(st, parent):
+                            return False
+                        del scopes[depth+1:]
                         parent.append(line)
                         
                 else:
                     if isinstance(parent, list):
+                        entry = st.pending.get(id(parent)) if st.pending else None
+                        if entry!=None:
+                            if entry[4]==default_type:
+                                del scopes[depth+1:]
+                                entry[5].append((line, line_count))
+                                continue
+                            if not _._fill_list(st, parent):
+                                return False
                         try:
-                            line = JCParser.types[default_type](line)
+                            line = types[default_type](line)
                         except:
-                            _.errors += "value error(line {}); failed to parse <{}> to list default type <{}>\n".format(line_count, line, t)
-                            if _.__verbose__:
-                                _.log("value error(line {}); failed to parse <{}> to list default type <{}>".format(line_count, line, t))
+                            _._line_error(st, "list-value", line_count, indent+1, "value error(line %s); failed to parse <%s> to list default type <%s>", line_count, line, t)
                             if _.__strictsyntax__:
                                 _.parsed_data = {}
-                                return
+                                return False
                             else: continue
 
+                        del scopes[depth+1:]
                         parent.append(line)
 
                     else:
+                        if schema!=None and path!=None and not _._schema_container(st, schema, path+(line,), "{}", line_count, indent):
+                            if _.__strictsyntax__:
+                                _.parsed_data = {}
+                                return False
+                            else: continue
+
                         parent[line] = {}
-                        obj = parent[line]
-                        indents[indent] = obj
+                        obj, obj_path = parent[line], (None if path==None else path+(line,))
+                        if obj_path!=None:
+                            st.define(obj_path, obj)
+                        del scopes[depth+1:]
+                        scopes.append([indent, obj, obj_path])
+
+        st.default_type, st.indent_unit = default_type, indent_unit
+        if st.pending and not _._flush_arrays(st):
+            return False
+        return True
+
+    def _include(_, target, parent, path, st, line_count, indent):
+        '''
+        put the keys of the config file `target` (relative to the directory of the file being
+        parsed, $ENV_VARS expanded) in the dict `parent` at key path `path`. the file is parsed
+        on its own (see _fragment) and each include gets its own copy of its data. returns
+        False if it could not be included
+        '''
+        env_vars = _scan_tokens(target)[0]
+        if env_vars:
+            target = _._expand_env(target, env_vars, st)
+        if not target:
+            _._line_error(st, "include-format", line_count, indent+1, "syntax error(line %s); includes are written as __include__ PATH", line_count)
+            return False
+        if isinstance(parent, list):
+            _._line_error(st, "include-in-list", line_count, indent+1, "include error(line %s); <%s> can't be included in a list", line_count, target)
+            return False
+
+        real = os.path.realpath(os.path.join(_._include_dir, target))
+        if real in _._including:
+            _._line_error(st, "include-cycle", line_count, indent+1, "include error(line %s); <%s> includes itself", line_count, target)
+            return False
+        fragment = _._fragment(real)
+        if isinstance(fragment, JCParser):
+            errors = [d for d in fragment.diagnostics if d.severity=="error"]
+            _._line_error(st, "include", line_count, indent+1, "include error(line %s); could not include <%s>: %s", line_count, target, errors[0].message.strip() if errors else "")
+            return False
+
+        data = copy.deepcopy(fragment['data'])
+        schema = _.schema.paths if _.schema!=None and path!=None else None
+        for key in data:
+            value = data[key]
+            if schema!=None and path+(key,) in schema:
+                value, problem = schema[path+(key,)].check(value)
+                if problem!=None:
+                    _._line_error(st, "schema", line_count, indent+1, "schema error(line %s); <%s> %s", line_count, "/".join(path+(key,))+problem[0], problem[1])
+                    return False
+            parent[key] = value
+            if path!=None:
+                st.define(path+(key,), value)
+
+        includes = dict(fragment['includes'])
+        includes[real] = fragment['identity']
+        _.includes.update(includes)
+        _.env_deps.update(fragment['env_deps'])
+        if st.section_includes!=None:
+            st.section_includes.update(includes)
+            st.section_env.update(fragment['env_deps'])
+        return True
+
+    def _fragment(_, real):
+        '''
+        the included file at real path `real` parsed on its own as a dict of its 'data',
+        'identity' (see _file_identity), 'env_deps' and 'includes', or the JCParser that
+        failed to parse it. a fragment is served from _FRAGMENTS while it, the files it
+        includes and the environment variables it expands are unchanged
+        '''
+        key = (real, _._array_kind())
+        with _FRAGMENTS_LOCK:
+            entry = _FRAGMENTS.get(key)
+        identity = _file_identity(real) # before parsing, so an edit meanwhile is a miss later
+        if entry!=None and entry['identity']==identity and not (
+            _includes_changed(entry['includes']) or _env_changed(entry['env_deps'], _._environ)):
+            return entry
+
+        fragment = JCParser(verbose=False, typed_arrays=_.typed_arrays, env=_._environ)
+        fragment._include_chain = _._including
+        fragment.parse(real)
+        if not fragment.status:
+            return fragment
+
+        entry = {'data': fragment.parsed_data, 'identity': identity,
+            'env_deps': fragment.env_deps, 'includes': fragment.includes}
+        with _FRAGMENTS_LOCK:
+            if len(_FRAGMENTS)>=_FRAGMENTS_MAX:
+                _FRAGMENTS.clear()
+            _FRAGMENTS[key] = entry
+        return entry
+
+    def _line_error(_, st, code, line, column, fmt, *args):
+        '''
+        report an error in a line being parsed. under strict syntax the typed lists waiting
+        for their arrays (see _fill_array) are checked first, so an item before the line that
+        cant be converted is reported instead, as it was when items were converted as they
+        were read
+        '''
+        if st.pending and _.__strictsyntax__ and not _._flush_arrays(st):
+            return
+        _._report(_.__verbose__, "error", code, line, column, fmt, *args)
 
+    def _schema_container(_, st, schema, path, kind, line_count, indent):
+        "report and return False if the schema field at path is not of container kind {} or []"
+        field = schema.get(path)
+        if field==None or field.type==None:
+            return True
+        if field.type==kind or (kind=="[]" and field.type in _.list_types):
+            return True
+        _._line_error(st, "schema", line_count, indent+1, "schema error(line %s); <%s> must be of type <%s>", line_count, "/".join(path), field.type)
+        return False
+
+    def _finish_schema(_):
+        '''
+        the part of the schema check that waits for the whole config: defaults and required
+        keys of its dicts and the items of its lists. values were checked as they were parsed
+        (see _parse_lines), so only the schema's dicts are visited rather than the whole
+        config. returns False if parsing failed
+        '''
+        for path, field in _.schema.dicts:
+            obj = _.parsed_data
+            for key in path:
+                obj = obj.get(key) if isinstance(obj, dict) else None
+            if not isinstance(obj, dict):
+                continue # a missing dict is reported by its parent if it is required
+            problem = _check_keys(obj, field.keys, False)
+            if problem!=None:
+                _._report(_.__verbose__, "error", "schema", None, None, "schema error; <%s> %s", ("/".join(path)+problem[0]).lstrip("/"), problem[1])
+                if _.__strictsyntax__:
+                    _.parsed_data = {}
+                    return False
+        return True
+
+    def _expand_env(_, text, env_vars, st):
+        '''
+        replace the $ENV_VARS in text with their values in one pass, recording them in
+        _.env_deps. unset and empty variables are left as they are. a text is expanded once
+        per parse and repeats are served from st.env_memo
+        '''
+        hit = st.env_memo.get(text)
+        if hit==None:
+            environ, deps = _._environ, {}
+            def expand(match):
+                if match.lastindex!=1: # a reference, see _substitute_refs
+                    return match.group(0)
+                value = deps[match.group(1)] = environ.get(match.group(1))
+                return value or match.group(0)
+            hit = st.env_memo[text] = (_TOKENS.sub(expand, text), deps)
+
+        text, deps = hit
+        _.env_deps.update(deps)
+        if st.section_env!=None:
+            st.section_env.update(deps)
+        return text
+
+    def _array_kind(_):
+        "what typed lists are parsed into: None (lists), \"numpy\" or \"array\""
+        if not _.typed_arrays:
+            return None
+        return "array" if _.typed_arrays=="array" or _numpy()==None else "numpy"
+
+    def _place(_, st, entry, value):
+        '''
+        put `value` where the typed list of `entry` (see _parse_lines) was defined, unless that
+        key has been defined again since
+        '''
+        obj, parent, key, path = entry[:4]
+        if isinstance(parent, dict) and parent.get(key, _MISSING) is not entry[6]:
+            return
+        parent[key] = value
+        if path!=None and st.index.get(path) is entry[6]:
+            st.define(path, value)
+        entry[6] = value
+
+    def _bad_item(_, st, item, line_count, t):
+        '''
+        report a typed list item that cant be converted, True if parsing has to stop. the
+        item is only converted after the lines that follow it were parsed, so what they
+        reported goes after it, or is dropped under strict syntax as parsing stops at the item
+        '''
+        diagnostics = _.diagnostics
+        later = [d for d in diagnostics[st.reported:] if d.line!=None and d.line>line_count]
+        if later:
+            diagnostics[st.reported:] = [d for d in diagnostics[st.reported:]
+                if d.line==None or d.line<=line_count]
+            _._texts = {}
+        _._report(_.__verbose__, "error", "list-value", line_count, None, "value error(line %s); failed to parse <%s> to list default type <%s>", line_count, item, t)
+        if _.__strictsyntax__:
+            _.parsed_data = {}
+            return True
+        diagnostics.extend(later)
+        return False
+
+    def _fill_array(_, st, entry):
+        '''
+        convert the items collected for a typed list to its array in one go and put the array
+        in its place. if that fails the items that cant be converted are reported (and left
+        out under __nonstrictsyntax__), and if an item is of the list's type but doesnt fit
+        its array (eg an int beyond 64 bits) the list stays a plain list. returns False if
+        parsing has to stop
+        '''
+        kind, t, items = _._array_kind(), entry[4], entry[5]
+        # entry: [list, parent, key in parent, key path, t, [(item, line_count)], what is in
+        # its place now, how many items that holds]
+        try:
+            value = _make_array(kind, t, [item for item,line_count in items])
+        except Exception:
+            good, bad = [], []
+            for item, line_count in items:
+                try:
+                    _make_array(kind, t, [item])
+                except Exception:
+                    try:
+                        _._types[t](item)
+                    except Exception:
+                        bad.append((item, line_count))
+                        continue
+                    st.pending.pop(id(entry[0]), None)
+                    return _._to_list(st, entry)
+                good.append((item, line_count))
+            for item, line_count in bad:
+                if _._bad_item(st, item, line_count, t):
+                    return False
+            items[:] = good
+            value = _make_array(kind, t, [item for item,line_count in items])
+        _._place(st, entry, value)
+        entry[7] = len(items)
+        return True
+
+    def _fill_list(_, st, obj):
+        '''
+        the typed list `obj` got an item that is not of its type, so it stays a plain list:
+        convert the items collected so far one at a time into it. returns False if parsing
+        has to stop
+        '''
+        return _._to_list(st, st.pending.pop(id(obj)))
+
+    def _to_list(_, st, entry):
+        "convert the items collected for the typed list of `entry` into the list itself"
+        obj, t = entry[0], entry[4]
+        for item, line_count in entry[5]:
+            try:
+                obj.append(_._types[t](item))
+            except:
+                if _._bad_item(st, item, line_count, t):
+                    return False
+        _._place(st, entry, obj)
+        return True
+
+    def _flush_arrays(_, st, depth=None):
+        '''
+        fill in the arrays of the typed lists waiting in st.pending, except those in the
+        scopes up to `depth` if it is given: the ones a line that uses references stays in.
+        lists that are still open stay pending, to be filled in again if they get more items.
+        returns False if parsing has to stop
+        '''
+        open_lists = set(id(scope[1]) for scope in st.scopes)
+        keep = set() if depth==None else set(id(scope[1]) for scope in st.scopes[:depth+1])
+        for key in list(st.pending):
+            if key in keep:
+                continue
+            entry = st.pending[key]
+            if key not in open_lists:
+                del st.pending[key]
+            if entry[7]!=len(entry[5]) and not _._fill_array(st, entry):
+                return False
+        return True
+
+    def _parse_sections(_, data, st, previous):
+        '''
+        parse data one top-level section at a time (see _section_starts), recording each
+        section in _._sections so the next parse of the file can reuse the ones that did not
+        change. a section from `previous` (the last parse's sections) is spliced in instead of
+        being parsed again if it has the same lines, starts in the same parser state (open
+        scopes included), the references it resolved outside itself still resolve to the
+        same values and the environment variables it expanded still have the same values. a
+        section with warnings must also start on the same line, as the warnings carry line
+        numbers.
+
+        sections are not recorded if the parse had errors, since under __nonstrictsyntax__ a
+        rejected line can leave the previous section open. the recorded values are private
+        copies and a reused section gets fresh copies of them, so changes callers make to the
+        data never reach the next parse
+        '''
+        copies = {} # recorded (private) object id -> its copy in this parse
+        originals = {} # and back
+        unused = {}
+        for sec in previous or ():
+            unused.setdefault(sec['lines'], []).append(sec)
+
+        sections = []
+        starts = _section_starts(data)
+        starts.append(len(data))
+        for k in range(len(starts)-1):
+            start, end = starts[k], starts[k+1]
+            lines = tuple(data[start:end])
+            state_in = (_.__strictindent__, _.__strictsyntax__, _.__verbose__,
+                st.indent_unit, st.default_type, tuple(scope[0] for scope in st.scopes))
+
+            candidates = unused.get(lines, ())
+            for i in range(len(candidates)):
+                if _._section_reusable(candidates[i], start, state_in, st, copies):
+                    sec = candidates.pop(i)
+                    _._splice_section(sec, st, copies, originals)
+                    # its recorded values stay private, see below
+                    sec = dict(sec, start=start, reused=True)
+                    break
+            else:
+                reported = len(_.diagnostics)
+                st.section_keys, st.section_deps, st.section_env = [], [], {}
+                st.section_includes = {}
+                if not _._parse_lines(lines, start, st):
+                    return False
+                sec = {
+                    'lines': lines, 'start': start, 'state_in': state_in,
+                    'state_out': (_.__strictindent__, _.__strictsyntax__, _.__verbose__,
+                        st.indent_unit, st.default_type, tuple(scope[0] for scope in st.scopes)),
+                    # the scopes left open, which decide how the next lines nest
+                    'scopes': [list(scope) for scope in st.scopes[1:]],
+                    'assigned': [(key, _.parsed_data[key]) for key in st.section_keys],
+                    'deps': st.section_deps, 'env': st.section_env, 'includes': st.section_includes,
+                    'warnings': _.diagnostics[reported:], # no errors, see below
+                }
+            sections.append(sec)
+
+        st.section_keys = st.section_deps = st.section_env = st.section_includes = None
+        if not [d for d in _.diagnostics if d.severity=="error"]:
+            # the parsed sections are copied with a memo that maps the reused sections' values
+            # back to their private originals, so values shared across sections stay shared
+            for sec in sections:
+                if sec.pop('reused', False):
+                    continue
+                sec['assigned'], sec['deps'], sec['scopes'] = _copy_section(
+                    sec['assigned'], sec['deps'], sec['scopes'], originals)
+            _._sections = sections
+        return True
+
+    def _section_reusable(_, sec, start, state_in, st, copies):
+        if sec['state_in']!=state_in or (sec['warnings'] and sec['start']!=start):
+            return False
+        if _env_changed(sec['env'], _._environ) or _includes_changed(sec['includes']):
+            return False
+        for ref, value, problem in sec['deps']:
+            new_value, new_problem = _._resolve_ref(ref, st)
+            if new_problem!=problem:
+                return False
+            if isinstance(value, (dict, list)) or _is_typed_array(value):
+                # whole-value references share the referenced container itself, so it has
+                # to be the copy of the one recorded, made when its section was reused
+                if new_value is not copies.get(id(value)):
+                    return False
+            elif type(new_value)!=type(value) or new_value!=value:
+                return False
+        return True
+
+    def _splice_section(_, sec, st, copies, originals):
+        '''
+        put a copy of a section reused from the last parse into the parse in progress,
+        recording in `copies` what each copied object became and in `originals` the reverse
+        '''
+        assigned, deps, scopes = _copy_section(sec['assigned'], (), sec['scopes'], copies,
+            originals)
+        for key, value in assigned:
+            _.parsed_data[key] = value
+            # only the top-level key is indexed, references deeper into the section walk
+            # down from it
+            _index_set(st.index, (key,), value)
+        _.diagnostics.extend(sec['warnings'])
+        _.env_deps.update(sec['env'])
+        _.includes.update(sec['includes'])
+        _.__strictindent__, _.__strictsyntax__, _.__verbose__, st.indent_unit, \
+            st.default_type = sec['state_out'][:5]
+        st.scopes[1:] = [list(scope) for scope in scopes]
+
+    def _publish(_, changes_only=False):
+        '''
+        hand the parsed data to the container and/or a new snapshot and, if this replaces an
+        earlier parse, tell the subscribers what changed. with changes_only nothing is
+        published if the data is the same as last time
+        '''
+        old, subscribers, diff = _._published, _._subscribers, None
+        if subscribers or (changes_only and old!=None):
+            diff = {"generation": _.generation+1, "added": [], "removed": [], "changed": []}
+            # everything is new if nothing was published before (the first parse failed)
+            _diff_paths({} if old==None else old, _.parsed_data, "", diff)
+            if changes_only and old!=None and not (diff["added"] or diff["removed"] or
+                diff["changed"]):
+                return
+
+        _._published = _.parsed_data
+        _.generation += 1
+        if _.use_snapshot:
+            _.snapshot = JCSnapshot(_.parsed_data, _.generation)
         if _.container!=None:
             _.container.clear()
             for k in _.parsed_data:
                 _.container[k] = _.parsed_data[k]
-        _.status = True
+
+        for callback in subscribers:
+            try:
+                callback(diff)
+            except Exception as e:
+                _.log("subscriber {} raised {!r}".format(callback, e))
+
+    def subscribe(_, callback):
+        '''
+        call `callback(diff)` after every successful reparse of the config, from the thread
+        that parsed it (the autoupdate daemon for autoupdated parsers). diff is a dict with
+        the new "generation" and lists of the "added", "removed" and "changed" key paths,
+        written like references eg data/types[1]. returns callback, for unsubscribe()
+        '''
+        # copy-on-write so _publish can walk the list without a lock
+        _._subscribers = _._subscribers+[callback]
+        return callback
+
+    def unsubscribe(_, callback):
+        "stop calling a subscribed callback. returns False if it was not subscribed"
+        if callback not in _._subscribers:
+            return False
+        _._subscribers = [c for c in _._subscribers if c is not callback]
+        return True
                             
     def write(_, data, fout_path, tabsize=TAB_SIZE):
         "attempt to dump dictionary data to a jerm-config-file"
@@ -801,39 +3049,29 @@ class JCParser:
         _._reset()
         
         if not isinstance(data, dict):
-            _.warnings += "warning, only dictionaries can be dumped to config files!\n"
-            if _.verbose:
-                _.log("warning, only dictionaries can be dumped to config files!")
+            _._report(_.verbose, "warning", "not-dict", None, None, "warning, only dictionaries can be dumped to config files!")
             return
         
-        try:
-            fout = open(fout_path, "wb")
-        except:
-            _.warnings += "could not create config file: <{}>\n".format(fout_path)
-            if _.verbose:
-                _.log("could not create config file: <{}>".format(fout_path))
-            return
+        # the whole file is built in memory and encoded once, then written next to fout_path
+        # and renamed over it so readers (eg autoupdate) never see a half-written config
+        out = [HELP]
+        out.extend(_.iter_lines(data, tabsize))
 
-        fout.write(fdata(HELP))
-        
-        if data:
-            _._write(data, fout, tabsize, 0)
-            
-        fout.close()
+        if not _atomic_write(fout_path, fdata("".join(out))):
+            _._report(_.verbose, "warning", "write-failed", None, None, "could not create config file: <%s>", fout_path)
+            return
 
         _.status = True
         
-    def log(_,msg):
-        if "error" in msg and not _.__strictsyntax__:
+    def log(_, msg, *args, **kwargs):
+        '''
+        log msg % args to the JermConfig logger, formatted only if it is emitted. the level is
+        `level` if given, else ERROR if msg mentions an error and WARNING otherwise
+        '''
+        level = kwargs.get("level", logging.ERROR if "error" in msg else logging.WARNING)
+        if level>=logging.ERROR and not getattr(_, "__strictsyntax__", True):
             msg += "(line treated as comment since __nonstrictsyntax__ was set)"
-
-        if "win" in sys.platform.lower():
-            print ("[JERM-PARSER] {}".format(msg))
-        else:
-            if "error" in msg:
-                print ("\033[1;31m[JERM-PARSER]\033[0m {}".format(msg))
-            else:
-                print ("\033[1;33m[JERM-PARSER]\033[0m {}".format(msg))
+        _LOG.log(level, msg, *args)
 
     def template(_, fpath):
         try:
@@ -855,6 +3093,72 @@ class JCParser:
         
         return False
 
+    def _resolve_ref(_, ref, st=None):
+        '''
+        find the value a reference points to without evaluating anything. during a parse it
+        is looked up in the parse state `st`: the leading keys in its index (see _index_set)
+        and the rest of the path is walked down from its root. otherwise it is looked up in
+        the parsed data. returns (value, problem) where problem is None, "missing",
+        "not-list" or "index"
+        '''
+        compiled = _compile_ref(ref)
+        if compiled==None:
+            return None, "missing"
+        steps, head = compiled
+
+        root = _.parsed_data if st==None else st.root
+        if st!=None:
+            hit = st.index.get(head, _MISSING)
+            if hit is not _MISSING:
+                return _walk_ref(hit, steps[len(head):], root)
+        return _walk_ref(root, steps, root)
+
+    def get(_, path, default=None):
+        '''
+        the value at `path` in the parsed data, written like a reference without the backticks
+        eg parser.get("data/types[1]"). `default` if there is no such value
+        '''
+        compiled = _compile_ref(path)
+        if compiled==None:
+            return default
+        value, problem = _walk_ref(_.parsed_data, compiled[0], _.parsed_data)
+        return default if problem else value
+
+    def compile_path(_, path, cache=False):
+        "a JCPath for looking `path` up in this parser's data over and over, see JCPath"
+        return JCPath(_, path, cache)
+
+    def _substitute_refs(_, text, refs, line_count, st, whole=True):
+        '''
+        replace each `reference` in text with the value it points to. if `whole` is set and
+        text is nothing but a reference to a container or bool, that object itself is returned.
+        when sections are tracked, references to anything outside the current section are
+        recorded in st.section_deps with what they resolved to
+        '''
+        for ref in refs:
+            if not ref: continue
+
+            obj, problem = _._resolve_ref(ref, st)
+            if st.section_deps!=None:
+                compiled = _compile_ref(ref)
+                if compiled==None or compiled[0][0][1] not in st.section_keys:
+                    st.section_deps.append((ref, obj, problem))
+            if problem:
+                _._report(_.__verbose__, "warning", "ref-"+problem, line_count, None,
+                    "reference error, %s `%s` (line %s)", _REF_PROBLEMS[problem], ref, line_count)
+                continue
+
+            if whole and type(obj) not in [type(""),type(0),type(0.0)] and (
+                "`"+ref+"`"==text.strip()):
+                # obj is an object, not just a constant
+                return obj
+
+            if _is_typed_array(obj):
+                obj = obj.tolist() # written like the list it was parsed from
+            text = text.replace('`'+ref+'`', str(obj))
+
+        return text
+
     def _indent_level(_,line):
         if (not line) or (line[0] not in [' ','\t']): return 0
         
@@ -866,140 +3170,200 @@ class JCParser:
         
         return count
 
-    def _write(_, data, fout, tabsize, indent):
-        for k in data:
-            if not isinstance(k, str):
-                _.warnings += "warning, <{}> left out as its a key but NOT a string\n".format(k)
-                if _.verbose:
-                    _.log("warning, <{}> left out as its a key but NOT a string".format(k))
-                continue
-            
-            if type(data[k])not in JCParser.PyTypes:
-                _.warnings += "warning, <{}> left out as its not of supported types\n".format(data[k])
-                if _.verbose:
-                    _.log("warning, <{}> left out as its not of supported types".format(data[k]))
-                continue
-            
-            # basic types...
-            if isinstance(data[k], str):
-                line =  "{}{} = {}".format(" "*indent+""*tabsize, k, data[k])
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-            elif str(data[k]) in ["True", "False"]:
-                # this comes before checking is data[k] is int as bools are ints!
-                line =  "{}{}:b = {}".format(" "*indent+""*tabsize, k, data[k])
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-            elif isinstance(data[k], int):
-                line =  "{}{}:i = {}".format(" "*indent+""*tabsize, k, data[k])
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-            elif isinstance(data[k], float):
-                line =  "{}{}:f = {}".format(" "*indent+""*tabsize, k, data[k])
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-                    
-            # dict type...
-            elif isinstance(data[k], dict):
-                line =  " "*indent + k
-                fout.write(fdata("\n\n"+line))
-                line =  "{}{}".format(" "*indent+" "*tabsize, "# dict data is indented here...")
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-                _._write(data[k],fout,tabsize, indent+tabsize)
+    def iter_lines(_, data, tabsize=TAB_SIZE):
+        '''
+        generate the config text for dictionary `data` (without the HELP header) a line at a
+        time, each with the newline(s) that go before it. nesting is tracked with an explicit
+        stack so deeply nested data cant hit the recursion limit, and list values can be any
+        iterable (eg a generator) so huge lists are written without being built first
+        '''
+        # each frame is [iterator over the container's items, is it a dict, its indent]
+        stack = [[iter(data.items()), True, 0]]
+        while stack:
+            items, in_dict, indent = stack[-1]
+            pad = " "*indent
+            for item in items:
+                if in_dict:
+                    k, v = item
+                    if not isinstance(k, str):
+                        _._report(_.verbose, "warning", "key-not-str", None, None, "warning, <%s> left out as its a key but NOT a string", k)
+                        continue
+                else:
+                    k, v = None, item
 
-            # list/tuple type...
-            elif isinstance(data[k], list) or isinstance(data[k], tuple):
-                line =  "{}{}[]".format(" "*indent+""*tabsize, k)
-                fout.write(fdata("\n\n"+line))
+                listlike = _is_listlike(v)
+                if type(v) not in JCParser.PyTypes and not listlike:
+                    if in_dict:
+                        _._report(_.verbose, "warning", "unsupported-type", None, None, "warning, <%s> left out as its not of supported types", v)
+                    else:
+                        _.log("warning, <{}> left out as its not of supported types".format(v))
+                    continue
+
+                # basic types...
+                # (bool comes before int as bools are ints!)
+                if isinstance(v, str):
+                    line = "{}{} = {}".format(pad, k, v) if in_dict else pad+v
+                elif isinstance(v, bool):
+                    line = "{}{}:b = {}".format(pad, k, v) if in_dict else "{}{}:b".format(pad, v)
+                elif isinstance(v, int):
+                    line = "{}{}:i = {}".format(pad, k, v) if in_dict else "{}{}:i".format(pad, v)
+                elif isinstance(v, float):
+                    line = "{}{}:f = {}".format(pad, k, v) if in_dict else "{}{}:f".format(pad, v)
+
+                # dict type...
+                elif isinstance(v, dict):
+                    yield "\n\n"+pad+(k if in_dict else "{}")
+                    line = "{}{}".format(pad+" "*tabsize, "# dict data is indented here...")
+                    yield "\n"+line
+                    if _.verbose:
+                        print(line)
+                    stack.append([iter(v.items()), True, indent+tabsize])
+                    break
+
+                # list/tuple/iterable type...
+                else:
+                    # typed arrays are written as [i]/[f] lists of untyped items
+                    t = None
+                    if _is_typed_array(v):
+                        t, v = _array_type(v), v.tolist()
+                        if t:
+                            v = map(repr, v)
+                    line = "{}{}[{}]".format(pad, k if in_dict else "", t or "")
+                    yield "\n\n"+line
+                    if in_dict:
+                        if _.verbose:
+                            print(line)
+                    else:
+                        line = "{}{}".format(pad+" "*tabsize, "# list data is indented here...")
+                        yield "\n"+line
+                        if _.verbose:
+                            print(line)
+                    yield "\n{}{}".format(pad+" "*tabsize, "# list data is indented here...")
+                    stack.append([iter(v), False, indent+tabsize])
+                    break
+
+                yield "\n"+line
                 if _.verbose:
                     print(line)
-                _._write_list(data[k],fout,tabsize, indent+tabsize)
+            else:
+                stack.pop()
+
+    def dump_stream(_, data, fileobj, tabsize=TAB_SIZE, header=True, buffer_size=1<<16):
+        '''
+        write dictionary `data` as config text to an open file object, text or binary, in
+        writes of about `buffer_size` characters as iter_lines generates it. unlike write()
+        the output is not atomic; it goes wherever fileobj points
+        '''
+        _._reset()
 
-    def _write_list(_, data, fout, tabsize, indent):
-        if type(data) not in [type([]), type(())]:
-            _.log("warning, _write_list ONLY writes lists/tuples. <{}> is not!".format(data))
+        if not isinstance(data, dict):
+            _._report(_.verbose, "warning", "not-dict", None, None, "warning, only dictionaries can be dumped to config files!")
             return
 
-        line =  "{}{}".format(" "*indent+""*tabsize, "# list data is indented here...")
-        fout.write(fdata("\n"+line))
-        
-        for entry in data:
-            if type(entry)not in JCParser.PyTypes:
-                _.log("warning, <{}> left out as its not of supported types".format(entry))
-                continue
+        # io's classes tell text from bytes. other file objects (whose mode may not even be
+        # a string, eg an int) get text until they refuse it
+        if isinstance(fileobj, io.TextIOBase):
+            binary = False
+        elif isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase)):
+            binary = True
+        else:
+            binary = None
+
+        def flush(text, binary):
+            "write text, as bytes if binary. returns whether bytes were written"
+            if not binary:
+                try:
+                    fileobj.write(text)
+                    return False
+                except TypeError:
+                    if binary==False:
+                        raise
+            fileobj.write(fdata(text))
+            return True
 
-            if isinstance(entry, str):
-                line =  "{}{}".format(" "*indent+""*tabsize, entry)
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-            elif str(entry) in ["True", "False"]:
-                # this comes before checking is data[k] is int as bools are ints!
-                line =  "{}{}:b".format(" "*indent+""*tabsize, entry)
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-            elif isinstance(entry, int):
-                line =  "{}{}:i".format(" "*indent+""*tabsize, entry)
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-            elif isinstance(entry, float):
-                line =  "{}{}:f".format(" "*indent+""*tabsize, entry)
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-                    
-            # dict type...
-            elif isinstance(entry, dict):
-                line =  "{}{}".format(" "*indent+""*tabsize, "{}")
-                fout.write(fdata("\n\n"+line))
-                line =  "{}{}".format(" "*indent+" "*tabsize, "# dict data is indented here...")
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-                _._write(entry,fout,tabsize, indent+tabsize)
-
-            # list/tuple type...
-            elif isinstance(entry, list) or isinstance(entry, tuple):
-                line =  "{}[]".format(" "*indent+""*tabsize)
-                fout.write(fdata("\n\n"+line))
-                line =  "{}{}".format(" "*indent+" "*tabsize, "# list data is indented here...")
-                fout.write(fdata("\n"+line))
-                if _.verbose:
-                    print(line)
-                _._write_list(entry,fout,tabsize, indent+tabsize)
+        buf, size = [HELP] if header else [], 0
+        for chunk in _.iter_lines(data, tabsize):
+            buf.append(chunk)
+            size += len(chunk)
+            if size>=buffer_size:
+                binary = flush("".join(buf), binary)
+                buf, size = [], 0
+        if buf:
+            flush("".join(buf), binary)
+
+        _.status = True
+
+_timer = getattr(time, "perf_counter", time.time)
+
+def _parse_one(fpath, options):
+    "parse_many's unit of work. it runs in the pool's worker processes so it has to be top-level"
+    started = _timer()
+    # the data is shipped back whole anyway, and a JCLazyData (which holds its parser) cant
+    # be pickled out of a worker
+    parser = JCParser(fpath, **dict(options, lazy=False))
+    return {
+        "path": fpath,
+        "status": parser.status,
+        "data": parser.parsed_data,
+        "errors": parser.errors,
+        "warnings": parser.warnings,
+        "time": _timer()-started,
+    }
+
+def _parse_chunk(args):
+    fpaths, options = args
+    return [_parse_one(fpath, options) for fpath in fpaths]
+
+# below this many files per worker, parse_many parses in this process as starting the pool
+# and shipping results back costs more than it saves
+PARSE_MANY_MIN_PER_WORKER = 4
+
+def parse_many(paths, workers=None, chunksize=None, **options):
+    '''
+    parse many config files, spread over `workers` processes (os.cpu_count() by default).
+    returns one dict per path, in the order of `paths`, with the "path", "status", "data",
+    "errors" and "warnings" of its parse and the seconds it took in "time". files are handed
+    to the workers `chunksize` at a time; by default each worker gets about four chunks.
+    small batches are parsed in this process. other keyword arguments (eg disk_cache) are
+    passed to JCParser, except lazy: "data" is always a plain dict
+    '''
+    paths = list(paths)
+    if workers==None:
+        import multiprocessing
+        workers = multiprocessing.cpu_count()
+    workers = max(1, min(workers, len(paths)//PARSE_MANY_MIN_PER_WORKER))
+
+    if workers==1:
+        return [_parse_one(fpath, options) for fpath in paths]
+
+    if chunksize==None:
+        chunksize = max(1, len(paths)//(workers*4))
+    chunks = [(paths[i:i+chunksize], options) for i in range(0, len(paths), chunksize)]
+
+    import multiprocessing
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = pool.map(_parse_chunk, chunks, 1)
+    finally:
+        pool.close()
+        pool.join()
+    return [result for chunk in results for result in chunk]
 
-    
 def test():
     path = os.path.realpath(__file__)
     path = os.path.split(path)[0]
     
-    parser = JCParser()
-
-    test_configs = os.listdir(os.path.join(path,"test"))
-    for test_config in test_configs:
-        print("\nparsing {}...".format(os.path.join(path,"test",test_config)))
-        parser.parse(os.path.join(path,"test",test_config))
+    test_configs = [os.path.join(path,"test",f) for f in os.listdir(os.path.join(path,"test"))]
+    for result in parse_many(test_configs):
+        print("\nparsing {}...".format(result["path"]))
 
-        if parser.warnings:
-            print (parser.warnings)
-        if not parser.status:
-            print (parser.errors)
+        if result["warnings"]:
+            print (result["warnings"])
+        if not result["status"]:
+            print (result["errors"])
 
         #print ("output:\n{}".format(parser.parsed_data))
 
-
-_jconf_auto_update_daemon = threading.Thread(target=_autoupdate_jconfig, args=())
-_jconf_auto_update_daemon.daemon = True
-_jconf_auto_update_daemon.start()
-        
 if __name__ == "__main__":
     import sys
     if len(sys.argv)>1:
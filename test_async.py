@@ -0,0 +1,56 @@
+# checks the asyncio front end (python3 only)
+# run with `python test_async.py` or pytest
+import os, sys, asyncio, tempfile, shutil
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import jcparser, jcasync
+
+def _run(coroutine, timeout=5):
+    async def bounded():
+        return await asyncio.wait_for(coroutine, timeout)
+    return asyncio.run(bounded())
+
+def test_awatch_missing_path_raises():
+    tmp = tempfile.mkdtemp(prefix="jc-async-")
+    try:
+        async def first():
+            async for snapshot in jcasync.awatch(os.path.join(tmp, "missing.jconf")):
+                return snapshot
+        try:
+            _run(first())
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError("awatch of a missing file did not raise")
+        assert jcparser.AUTO_UPDATING=={}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_awatch_yields_changes():
+    tmp = tempfile.mkdtemp(prefix="jc-async-")
+    try:
+        fpath = os.path.join(tmp, "t.jconf")
+        with open(fpath, "w") as fout:
+            fout.write("a:i = 1\n")
+
+        async def watch():
+            seen, watcher = [], jcasync.awatch(fpath)
+            async for snapshot in watcher:
+                seen.append(snapshot["a"])
+                if len(seen)==2:
+                    break
+                await asyncio.sleep(0.05)
+                with open(fpath, "w") as fout:
+                    fout.write("a:i = 2\n")
+            await watcher.aclose()
+            return seen
+        assert _run(watch())==[1, 2]
+        assert jcparser.AUTO_UPDATING=={}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    for name, test in sorted(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("ok")
@@ -0,0 +1,152 @@
+# checks what the autoupdate daemon picks up, with each watcher backend
+# run with `python test_autoupdate.py` or pytest
+import os, sys, time, tempfile, shutil
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import jcparser
+
+def _backends():
+    return ["inotify", "poll"] if sys.platform.startswith("linux") else ["poll"]
+
+def _wait(condition, timeout=3):
+    started = time.time()
+    while not condition() and time.time()-started<timeout:
+        time.sleep(0.01)
+    return condition()
+
+def _configmap_version(tmp, n):
+    "publish version n of app.jconf the way kubernetes updates a ConfigMap volume"
+    vdir = os.path.join(tmp, "..v{}".format(n))
+    os.mkdir(vdir)
+    with open(os.path.join(vdir, "app.jconf"), "w") as fout:
+        fout.write("a:i = {}\n".format(n))
+    link = os.path.join(tmp, "..data_tmp")
+    os.symlink("..v{}".format(n), link)
+    os.rename(link, os.path.join(tmp, "..data"))
+    if n>1:
+        shutil.rmtree(os.path.join(tmp, "..v{}".format(n-1)))
+
+def check_symlink_retarget(backend):
+    jcparser.configure_autoupdate(backend=backend)
+    tmp = tempfile.mkdtemp(prefix="jc-autoupdate-")
+    try:
+        _configmap_version(tmp, 1)
+        fpath = os.path.join(tmp, "app.jconf")
+        os.symlink(os.path.join("..data", "app.jconf"), fpath)
+
+        data = {}
+        with jcparser.JCParser(fpath, autoupdate=True, container=data):
+            assert data=={"a": 1}
+            for n in (2, 3, 4):
+                time.sleep(0.05)
+                _configmap_version(tmp, n)
+                assert _wait(lambda: data.get("a")==n), (backend, n, data)
+    finally:
+        jcparser.configure_autoupdate(backend="auto")
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_symlink_retarget():
+    for backend in _backends():
+        check_symlink_retarget(backend)
+
+def _write(fpath, text):
+    with open(fpath, "w") as fout:
+        fout.write(text)
+
+def check_touch_without_change(backend):
+    "saves that keep the bytes of a file and of what it includes publish nothing"
+    jcparser.configure_autoupdate(backend=backend, interval=0.02)
+    tmp = tempfile.mkdtemp(prefix="jc-autoupdate-")
+    try:
+        fpath, other = os.path.join(tmp, "t.jconf"), os.path.join(tmp, "other.jconf")
+        _write(other, "b:i = 2\n")
+        _write(fpath, "a:i = 1\n")
+        diffs = []
+        with jcparser.JCParser(fpath, autoupdate=True, snapshot=True) as parser:
+            parser.subscribe(diffs.append)
+
+            # the first touch after registering
+            time.sleep(0.05)
+            _write(fpath, "a:i = 1\n")
+            os.utime(fpath, (1, 1))
+            time.sleep(0.3)
+            assert parser.generation==1 and diffs==[], (backend, diffs)
+
+            # a change that adds an include, then a touch of both files
+            _write(fpath, "a:i = 1\n__include__ other.jconf\n")
+            assert _wait(lambda: parser.generation==2), backend
+            os.utime(other, (2, 2))
+            _write(fpath, "a:i = 1\n__include__ other.jconf\n")
+            time.sleep(0.3)
+            assert parser.generation==2 and len(diffs)==1, (backend, diffs)
+            assert diffs[0]["added"]==["b"], diffs
+    finally:
+        jcparser.configure_autoupdate(backend="auto", interval=0.1)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_touch_without_change():
+    for backend in _backends():
+        check_touch_without_change(backend)
+
+def test_unchanged_reload_without_content_hash():
+    "without content hashing a touch reparses the file but publishes nothing"
+    tmp = tempfile.mkdtemp(prefix="jc-autoupdate-")
+    try:
+        fpath = os.path.join(tmp, "t.jconf")
+        _write(fpath, "a:i = 1\n")
+        diffs = []
+        with jcparser.JCParser(fpath, autoupdate=True, snapshot=True, content_hash=False) as parser:
+            parser.subscribe(diffs.append)
+            snapshot = parser.snapshot
+            time.sleep(0.05)
+            os.utime(fpath, (1, 1))
+            time.sleep(0.3)
+            assert parser.generation==1 and diffs==[] and parser.snapshot is snapshot
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _in_forked_child(check):
+    "run check() in a forked child, true if it passed there"
+    pid = os.fork()
+    if pid==0:
+        try:
+            check()
+            status = 0
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            status = 1
+        os._exit(status)
+    return os.waitpid(pid, 0)[1]==0
+
+def test_fork_leaves_the_child_unwatched():
+    "a forked child watches nothing and starts a daemon only for watches of its own"
+    if not hasattr(os, "register_at_fork"):
+        return
+    tmp = tempfile.mkdtemp(prefix="jc-autoupdate-")
+    try:
+        fpath, other = os.path.join(tmp, "t.jconf"), os.path.join(tmp, "other.jconf")
+        _write(fpath, "a:i = 1\n")
+        _write(other, "b:i = 1\n")
+        with jcparser.JCParser(fpath, autoupdate=True, container={}) as parser:
+            def check():
+                assert jcparser.AUTO_UPDATING=={} and not parser.watched
+                assert jcparser._jconf_auto_update_daemon==None
+                parser.close()
+                data = {}
+                with jcparser.JCParser(other, autoupdate=True, container=data):
+                    assert jcparser._jconf_auto_update_daemon!=None
+                    time.sleep(0.05)
+                    _write(other, "b:i = 2\n")
+                    assert _wait(lambda: data.get("b")==2), data
+                assert jcparser._jconf_auto_update_daemon==None
+            assert _in_forked_child(check)
+            assert parser.watched and jcparser._jconf_auto_update_daemon!=None
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    for name, test in sorted(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("ok")
@@ -0,0 +1,93 @@
+# compares incremental reparses (as autoupdate does them) with full parses over random edits
+# run with `python test_incremental.py` or pytest
+import os, sys, random, tempfile, shutil
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import jcparser
+
+_LINES = [
+    "a = 1", "b:i = 2", "c = `a`", "d = x `b` y", "e:i = bad", "f = `nope`",
+    "g", "h{}", "l[i]", "m[]", "n[f]", "{}", "[]", "1", "2.5", "x", "k:b = yes",
+    "r = `l[0]`", "s = `g/a`", "__nonstrictsyntax__", "# comment", "",
+]
+
+def _random_line(rnd):
+    return "    "*rnd.choice((0, 0, 0, 1, 1, 2, 3))+rnd.choice(_LINES)
+
+def _edit(rnd, lines):
+    "insert, delete, replace or re-indent a random line"
+    op, i = rnd.randrange(4), rnd.randrange(len(lines)+1)
+    if op==0 or not lines:
+        lines.insert(i, _random_line(rnd))
+    elif op==1:
+        del lines[min(i, len(lines)-1)]
+    elif op==2:
+        lines[min(i, len(lines)-1)] = _random_line(rnd)
+    else:
+        i = min(i, len(lines)-1)
+        lines[i] = "    "*rnd.choice((0, 1, 2))+lines[i].strip()
+
+def _outcome(parser):
+    return parser.status, parser.parsed_data if parser.status else None, parser.errors
+
+def check(seed, edits=60, typed_arrays=False):
+    "returns the number of edits after which the incremental and full parses differ"
+    rnd = random.Random(seed)
+    tmp = tempfile.mkdtemp(prefix="jc-incremental-")
+    try:
+        fpath = os.path.join(tmp, "t.jconf")
+        lines = [_random_line(rnd) for i in range(rnd.randrange(1, 12))]
+
+        incremental = jcparser.JCParser(typed_arrays=typed_arrays)
+        incremental._track_sections = True # what autoupdated parsers do
+        mismatches = 0
+        for k in range(edits):
+            with open(fpath, "w") as fout:
+                fout.write("\n".join(lines)+"\n")
+            incremental.parse(fpath)
+            full = jcparser.JCParser(fpath, typed_arrays=typed_arrays)
+            if _outcome(incremental)!=_outcome(full):
+                mismatches += 1
+            _edit(rnd, lines)
+        return mismatches
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_incremental_matches_full_parse():
+    for seed in range(25):
+        assert check(seed)==0, "seed {}".format(seed)
+
+def test_incremental_matches_full_parse_typed_arrays():
+    for seed in range(10):
+        assert check(seed, typed_arrays="array")==0, "seed {}".format(seed)
+
+def test_reused_sections_are_copies():
+    "changes made to the data of one parse dont reach the next through a reused section"
+    tmp = tempfile.mkdtemp(prefix="jc-incremental-")
+    try:
+        fpath = os.path.join(tmp, "t.jconf")
+        with open(fpath, "w") as fout:
+            fout.write("db{}\n    pool:i = 5\n    hosts[]\n        a\nother = 1\nref = `db`\n")
+        parser = jcparser.JCParser(fpath)
+        parser._track_sections = True
+        parser.parse(fpath)
+        old = parser.parsed_data
+        old["db"]["pool"] = 999
+        old["db"]["hosts"].append("b")
+
+        with open(fpath, "w") as fout:
+            fout.write("db{}\n    pool:i = 5\n    hosts[]\n        a\nother = 2\nref = `db`\n")
+        parser.parse(fpath)
+        new = parser.parsed_data
+        assert new["db"]=={"pool": 5, "hosts": ["a"]}, new
+        assert new["db"] is not old["db"] and new["db"]["hosts"] is not old["db"]["hosts"]
+        # a whole-value reference still shares the container it points to
+        assert new["ref"] is new["db"]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    bad = sum(check(seed) for seed in range(25))+sum(
+        check(seed, typed_arrays="array") for seed in range(10))
+    print("mismatches: {}".format(bad))
+    sys.exit(1 if bad else 0)
@@ -0,0 +1,42 @@
+# checks that a memory-mapped file parses and fails like one that is read
+# run with `python test_mmap.py` or pytest
+import os, sys, tempfile, shutil
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import jcparser
+
+TEXT = "a:i = 1\n# comment\nb = x y\nl[]\n    1\n    2\nd{}\n    k = v\n\nc:f = 2.5\n"
+
+def _both(raw):
+    "(parser that read the file, parser that mapped it) for a file holding raw"
+    tmp = tempfile.mkdtemp(prefix="jc-mmap-")
+    try:
+        fpath = os.path.join(tmp, "t.jconf")
+        with open(fpath, "wb") as fout:
+            fout.write(raw)
+        return [jcparser.JCParser(fpath, use_mmap=use_mmap) for use_mmap in (False, True)]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_line_endings():
+    for newline in ("\n", "\r\n", "\r"):
+        read, mapped = _both(TEXT.replace("\n", newline).encode("utf-8"))
+        assert read.status and mapped.status, (newline, read.errors, mapped.errors)
+        assert read.parsed_data==mapped.parsed_data, (newline, mapped.parsed_data)
+        assert mapped.parsed_data["d"]=={"k": "v"}, newline
+
+def test_mixed_line_endings():
+    read, mapped = _both(TEXT.replace("\n", "\r", 3).encode("utf-8"))
+    assert read.parsed_data==mapped.parsed_data, mapped.parsed_data
+
+def test_undecodable_file():
+    for parser in _both(b"a = \xff\xfe\n"):
+        assert not parser.status
+        assert [d.code for d in parser.diagnostics]==["decode"], parser.diagnostics
+        assert "could not decode config file" in parser.errors, parser.errors
+
+if __name__ == "__main__":
+    for name, test in sorted(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("ok")
@@ -0,0 +1,43 @@
+# checks that schema fields only accept the containers their types allow
+# run with `python test_schema.py` or pytest
+import os, sys, tempfile, shutil
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import jcparser
+
+def _parse(text, schema):
+    tmp = tempfile.mkdtemp(prefix="jc-schema-")
+    try:
+        fpath = os.path.join(tmp, "t.jconf")
+        with open(fpath, "w") as fout:
+            fout.write(text)
+        return jcparser.JCParser(fpath, schema=schema)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_scalar_field_rejects_containers():
+    for text in ("port[]\n    80\n", "port{}\n    a = 1\n"):
+        parser = _parse(text, {"port": "i"})
+        assert not parser.status and parser.parsed_data=={}, text
+        assert "<port> must be of type <i>" in parser.errors, parser.errors
+
+def test_list_field_rejects_dict():
+    parser = _parse("hosts{}\n    a = 1\n", {"hosts": "[s]"})
+    assert not parser.status
+    assert "<hosts> must be of type <[s]>" in parser.errors, parser.errors
+
+def test_dict_field_rejects_list():
+    parser = _parse("db[]\n    a\n", {"db": "{}"})
+    assert not parser.status
+    assert "<db> must be of type <{}>" in parser.errors, parser.errors
+
+def test_matching_containers_pass():
+    parser = _parse("port[]\n    80\ndb{}\n    user = x\n", {"port": "[i]", "db": "{}"})
+    assert parser.status, parser.errors
+    assert parser.parsed_data=={"port": [80], "db": {"user": "x"}}
+
+if __name__ == "__main__":
+    for name, test in sorted(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("ok")
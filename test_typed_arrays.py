@@ -0,0 +1,70 @@
+# checks that typed arrays hold the same values, and fail the same way, as plain lists
+# run with `python test_typed_arrays.py` or pytest
+import os, sys, tempfile, shutil
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import jcparser
+
+def _kinds():
+    kinds = [False, "array"]
+    try:
+        import numpy
+        kinds.append("numpy")
+    except ImportError:
+        pass
+    return kinds
+
+def _plain(value):
+    if isinstance(value, dict):
+        return dict((k, _plain(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if jcparser._is_typed_array(value):
+        return value.tolist()
+    return value
+
+def _outcomes(text):
+    "(status, data, errors) of parsing text with each kind of typed arrays"
+    tmp = tempfile.mkdtemp(prefix="jc-arrays-")
+    try:
+        fpath = os.path.join(tmp, "t.jconf")
+        with open(fpath, "w") as fout:
+            fout.write(text)
+        outcomes = []
+        for kind in _kinds():
+            parser = jcparser.JCParser(fpath, typed_arrays=kind)
+            outcomes.append((parser.status, _plain(parser.parsed_data), parser.errors))
+        return outcomes
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_int_beyond_64_bits_stays_in_a_list():
+    for text in ("l[i]\n    1\n    99999999999999999999\n    3\n",
+            "a{}\n    l[i]\n        5\n        99999999999999999999\n    r = `a/l`\n"):
+        outcomes = _outcomes(text)
+        assert outcomes[0][0], outcomes[0]
+        assert outcomes.count(outcomes[0])==len(outcomes), outcomes
+
+    tmp = tempfile.mkdtemp(prefix="jc-arrays-")
+    try:
+        fpath = os.path.join(tmp, "t.jconf")
+        with open(fpath, "w") as fout:
+            fout.write("l[i]\n    1\n    99999999999999999999\n")
+        parser = jcparser.JCParser(fpath, typed_arrays="array")
+        assert type(parser.parsed_data["l"]) is list
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_items_judged_before_later_indicators():
+    "__nonstrictsyntax__ after a bad item doesnt let the item pass"
+    for text in ("l[i]\n    1\n    bad\n__nonstrictsyntax__\nx = 1\n",
+            "l[i]\n    1\n    bad\n    __nonstrictsyntax__\n    3\n"):
+        outcomes = _outcomes(text)
+        assert not outcomes[0][0], outcomes[0]
+        assert outcomes.count(outcomes[0])==len(outcomes), outcomes
+
+if __name__ == "__main__":
+    for name, test in sorted(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("ok")